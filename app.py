@@ -18,6 +18,8 @@ def app():
     app.config['PREFERRED_URL_SCHEME'] = os.environ.get(
         'PREFERRED_URL_SCHEME', 'http')
     app.url_map.strict_slashes = False
+    from model.utils import setup_json
+    setup_json(app)
     setup_smtp(app)
 
     # Apply security configurations (CSRF, Headers, Error Handlers)
@@ -73,6 +75,19 @@ def app():
     if not Course('Public'):
         Course.add_course('Public', 'first_admin')
 
+    # Migrate legacy list-based student scores
+    try:
+        migrate_student_scores()
+    except Exception as e:
+        app.logger.warning(f"Student score migration failed: {e}")
+
+    # Backfill hot scores on discussion posts that predate the field
+    try:
+        from mongo.discussion import migrate_hot_scores
+        migrate_hot_scores()
+    except Exception as e:
+        app.logger.warning(f"Hot score migration failed: {e}")
+
     # Initialize AI Models and Data
     try:
         AiModel.initialize_default_models()
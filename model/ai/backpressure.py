@@ -0,0 +1,143 @@
+"""
+Adaptive concurrency control for upstream AI calls.
+
+Implements an AIMD (additive-increase / multiplicative-decrease) gate, the
+same scheme TCP congestion control uses: concurrency grows slowly while the
+provider is healthy and is halved as soon as it signals overload (429/5xx or
+timeouts). This keeps us from hammering a degraded provider with requests
+that would only trip more quota errors.
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Dict
+
+from .exceptions import RateLimitExceededError
+from .logging import get_logger
+
+logger = get_logger('backpressure')
+
+__all__ = [
+    'AIMDController',
+    'get_controller',
+    'snapshot_all',
+    'is_overload_error',
+]
+
+
+def is_overload_error(exc) -> bool:
+    """
+    Whether an AI error signals provider overload: 429, 5xx, or no
+    status at all (timeouts / transport failures). Auth-style 4xx
+    errors are a key problem, not pressure, and must not shrink the
+    shared per-model limit.
+    """
+    status = getattr(exc, 'status_code', None)
+    return status is None or status == 429 or status >= 500
+
+# Initial / floor / ceiling for the concurrency limit.
+INIT_CONCURRENCY = 4
+MIN_CONCURRENCY = 1
+MAX_CONCURRENCY = 16
+# Additive increase step applied on each healthy response.
+INCREASE_STEP = 0.5
+# Responses slower than this (seconds) are treated as provider degradation.
+TARGET_LATENCY = 20.0
+# Sliding window size for latency averaging.
+WINDOW_SIZE = 32
+# How long a caller may wait for a slot before being rejected.
+ACQUIRE_TIMEOUT = 30.0
+
+_controllers: Dict[str, 'AIMDController'] = {}
+_controllers_lock = threading.Lock()
+
+
+class AIMDController:
+    """
+    Per-model concurrency gate with AIMD adjustment.
+
+    Use as a context manager around the upstream call, then report the
+    outcome with `record_ok(latency)` or `record_err()`.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._cond = threading.Condition()
+        self._limit = float(INIT_CONCURRENCY)
+        self._active = 0
+        self._latencies = deque(maxlen=WINDOW_SIZE)
+        # Counters for observability (see /health/ai)
+        self._ok_count = 0
+        self._err_count = 0
+        self._rejected_count = 0
+
+    def __enter__(self):
+        deadline = time.monotonic() + ACQUIRE_TIMEOUT
+        with self._cond:
+            while self._active >= int(self._limit):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not self._cond.wait(timeout=remaining):
+                    self._rejected_count += 1
+                    logger.warning(
+                        f"[{self.name}] Rejected request: concurrency limit "
+                        f"{int(self._limit)} saturated")
+                    raise RateLimitExceededError(
+                        'AI service is busy. Please try again later.')
+            self._active += 1
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        with self._cond:
+            self._active -= 1
+            self._cond.notify()
+        return False
+
+    def record_ok(self, latency: float):
+        """Additive increase when the window average stays under target."""
+        with self._cond:
+            self._ok_count += 1
+            self._latencies.append(latency)
+            avg = sum(self._latencies) / len(self._latencies)
+            if avg <= TARGET_LATENCY and self._limit < MAX_CONCURRENCY:
+                self._limit = min(self._limit + INCREASE_STEP,
+                                  float(MAX_CONCURRENCY))
+                self._cond.notify()
+
+    def record_err(self):
+        """Multiplicative decrease on provider overload or timeout."""
+        with self._cond:
+            self._err_count += 1
+            old_limit = int(self._limit)
+            self._limit = max(self._limit / 2, float(MIN_CONCURRENCY))
+            if int(self._limit) != old_limit:
+                logger.warning(
+                    f"[{self.name}] Concurrency limit halved: "
+                    f"{old_limit} -> {int(self._limit)}")
+
+    def snapshot(self) -> dict:
+        """Current controller state, for health reporting."""
+        with self._cond:
+            return {
+                'limit': int(self._limit),
+                'active': self._active,
+                'ok': self._ok_count,
+                'err': self._err_count,
+                'rejected': self._rejected_count,
+            }
+
+
+def get_controller(model_name: str) -> AIMDController:
+    """Get (or lazily create) the controller for a model."""
+    with _controllers_lock:
+        controller = _controllers.get(model_name)
+        if controller is None:
+            controller = _controllers[model_name] = AIMDController(model_name)
+        return controller
+
+
+def snapshot_all() -> dict:
+    """Snapshot every known controller, keyed by model name."""
+    with _controllers_lock:
+        controllers = list(_controllers.items())
+    return {name: controller.snapshot() for name, controller in controllers}
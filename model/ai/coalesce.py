@@ -0,0 +1,70 @@
+"""
+In-flight request coalescing for duplicate AI prompts.
+
+When identical requests arrive at nearly the same time (e.g. a double
+submit), only the first goes upstream; later callers wait on the same
+Future and share its result. Callers choose the dedupe scope through the
+key — anything user-specific (history, permissions) must be part of it.
+"""
+
+import hashlib
+import threading
+from concurrent.futures import Future
+from typing import Callable, Dict
+
+from .logging import get_logger
+
+logger = get_logger('coalesce')
+
+__all__ = [
+    'make_key',
+    'coalesced_call',
+]
+
+# How long a follower waits for the leader's result before giving up.
+RESULT_TIMEOUT = 90.0
+
+_INFLIGHT: Dict[bytes, Future] = {}
+_INFLIGHT_LOCK = threading.Lock()
+
+
+def make_key(*parts: str) -> bytes:
+    """Build a compact dedupe key from the request-identifying strings."""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part.encode())
+        digest.update(b'\x00')
+    return digest.digest()
+
+
+def coalesced_call(key: bytes, fn: Callable):
+    """
+    Run `fn` at most once per in-flight `key`.
+
+    The first caller (leader) executes `fn`; concurrent callers with the
+    same key block on the leader's Future and receive the same result or
+    exception. The key is released as soon as the leader finishes, so
+    later, non-overlapping requests run normally.
+    """
+    with _INFLIGHT_LOCK:
+        future = _INFLIGHT.get(key)
+        is_leader = future is None
+        if is_leader:
+            future = Future()
+            _INFLIGHT[key] = future
+
+    if not is_leader:
+        logger.debug("Coalesced duplicate in-flight request")
+        return future.result(timeout=RESULT_TIMEOUT)
+
+    try:
+        result = fn()
+    except BaseException as e:
+        future.set_exception(e)
+        raise
+    else:
+        future.set_result(result)
+        return result
+    finally:
+        with _INFLIGHT_LOCK:
+            _INFLIGHT.pop(key, None)
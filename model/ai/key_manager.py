@@ -2,6 +2,8 @@
 API Key management and rate limiting.
 """
 
+import threading
+import time
 from typing import Tuple, Optional
 
 from mongo import AiApiKey, Course
@@ -14,17 +16,24 @@ logger = get_logger('key_manager')
 __all__ = [
     'get_available_key',
     'get_model_for_course',
+    'resolve_course_key_and_model',
 ]
 
+# TTL for cached (key, model) resolutions in seconds.
+RESOLVE_TTL = 60.0
+_RESOLVE_CACHE_MAX = 1024
+_resolve_cache = {}
+_resolve_lock = threading.Lock()
+
 
 def get_available_key(
         course_name: str) -> Tuple[Optional[object], Optional[str]]:
     """
     Check and select an available API Key by course_name.
-    
+
     Args:
         course_name: The course identifier.
-        
+
     Returns:
         Tuple of (key_wrapper, error_message).
         If successful, error_message is None.
@@ -40,6 +49,12 @@ def get_available_key(
         logger.error(f"Error fetching course {course_name}: {e}")
         return None, "Course not found"
 
+    return _select_key(course, course_name)
+
+
+def _select_key(course,
+                course_name: str) -> Tuple[Optional[object], Optional[str]]:
+    """Select the best API key for an already-fetched course."""
     # 2. Check if AI is enabled for this course
     if not getattr(course, 'is_ai_vt_enabled', False):
         logger.info(f"AI disabled for course: {course_name}")
@@ -95,3 +110,76 @@ def get_model_for_course(course_name: str) -> str:
         logger.error(f"Error getting model for course {course_name}: {e}")
 
     return DEFAULT_MODEL
+
+
+def resolve_course_key_and_model(
+    course_name: str,
+    api_key_id: str = None,
+) -> Tuple[Optional[object], str, Optional[str]]:
+    """
+    Resolve the API key and model for a course in a single pass.
+
+    Successful resolutions are cached for RESOLVE_TTL seconds so bursty
+    callers (e.g. a teacher iterating on generated testcases) skip the
+    repeated Mongo round-trips paid by calling `get_available_key` and
+    `get_model_for_course` back-to-back. Usage counters on the returned
+    key are still mutated outside this cache.
+
+    Args:
+        course_name: The course identifier.
+        api_key_id: Optional specific API key ID to use instead of the
+            load-balanced selection.
+
+    Returns:
+        Tuple of (key, model_name, error_message).
+        On failure, key is None and error_message explains why.
+    """
+    cache_key = (course_name, api_key_id)
+    now = time.monotonic()
+    with _resolve_lock:
+        entry = _resolve_cache.get(cache_key)
+        if entry is not None and now - entry[0] < RESOLVE_TTL:
+            return entry[1]
+
+    result = _resolve(course_name, api_key_id)
+
+    # Only cache successes: a failed lookup (e.g. key just added) should
+    # not be sticky for a whole TTL window.
+    if result[0] is not None:
+        with _resolve_lock:
+            if len(_resolve_cache) >= _RESOLVE_CACHE_MAX:
+                _resolve_cache.clear()
+            _resolve_cache[cache_key] = (now, result)
+    return result
+
+
+def _resolve(
+    course_name: str,
+    api_key_id: str = None,
+) -> Tuple[Optional[object], str, Optional[str]]:
+    """Uncached resolution: one Course fetch covers both key and model."""
+    from .service import DEFAULT_MODEL
+
+    try:
+        course = Course(course_name)
+        if not course:
+            logger.warning(f"Course not found: {course_name}")
+            return None, DEFAULT_MODEL, "Course not found"
+    except Exception as e:
+        logger.error(f"Error fetching course {course_name}: {e}")
+        return None, DEFAULT_MODEL, "Course not found"
+
+    model_doc = getattr(course, 'ai_model', None)
+    model_name = getattr(model_doc, 'name', None) or DEFAULT_MODEL
+
+    if api_key_id:
+        try:
+            key = AiApiKey(api_key_id)
+            if not key or not getattr(key, 'is_active', False):
+                return None, model_name, "API key not found or inactive"
+        except Exception:
+            return None, model_name, "API key not found"
+        return key, model_name, None
+
+    key, error_msg = _select_key(course, course_name)
+    return key, model_name, error_msg
@@ -4,9 +4,12 @@ AI Test Case Generator Service.
 Generates test cases for problems using AI based on problem description.
 """
 
+import time
 from typing import Optional, Dict, Any
 
+from .backpressure import get_controller, is_overload_error
 from .context import get_problem_context
+from .exceptions import AIError
 from .service import call_ai_service
 from .logging import get_logger
 from .prompts import TESTCASE_GENERATOR_PROMPT, build_testcase_prompt
@@ -103,17 +106,26 @@ def generate_testcase(
     lang = '繁體中文' if language == 'chinese' else language
     lang_instruction = f"in {lang}" if lang else "in English"
 
-    # Call AI service
+    # Call AI service under the AIMD concurrency gate
     try:
-        response, in_tokens, out_tokens = call_ai_service(
-            api_key_value=api_key,
-            system_prompt=final_prompt,
-            history_messages=[],
-            user_message=
-            f"Please generate test cases. Remember to write explanations {lang_instruction}.",
-            current_code="",
-            model_name=model,
-            use_structured_output=False)
+        controller = get_controller(model)
+        with controller:
+            start = time.monotonic()
+            try:
+                response, in_tokens, out_tokens = call_ai_service(
+                    api_key_value=api_key,
+                    system_prompt=final_prompt,
+                    history_messages=[],
+                    user_message=
+                    f"Please generate test cases. Remember to write explanations {lang_instruction}.",
+                    current_code="",
+                    model_name=model,
+                    use_structured_output=False)
+            except AIError as e:
+                if is_overload_error(e):
+                    controller.record_err()
+                raise
+            controller.record_ok(time.monotonic() - start)
 
         if not response:
             logger.error("AI service returned empty response")
@@ -3,11 +3,13 @@ Vtuber-specific AI logic including emotion handling and persona.
 """
 
 import json
+import time
 from typing import Optional
 
 from mongo import AiApiKey, AiTokenUsage
 
 from .prompts import EMOTION_KEYWORDS, build_vtuber_prompt
+from .backpressure import get_controller, is_overload_error
 from .service import call_ai_service
 from .key_manager import get_available_key, get_model_for_course
 from .context import get_problem_context
@@ -100,15 +102,24 @@ def process_vtuber_request(user,
     # 5. Get model name
     model_name = get_model_for_course(course_name)
 
-    # 6. Call AI service
-    response_json, in_tokens, out_tokens = call_ai_service(
-        api_key_value=key.key_value,
-        system_prompt=system_prompt,
-        history_messages=history_for_ai,
-        user_message=message,
-        current_code=current_code,
-        model_name=model_name,
-        use_structured_output=True)
+    # 6. Call AI service under the AIMD concurrency gate
+    controller = get_controller(model_name)
+    with controller:
+        start = time.monotonic()
+        try:
+            response_json, in_tokens, out_tokens = call_ai_service(
+                api_key_value=key.key_value,
+                system_prompt=system_prompt,
+                history_messages=history_for_ai,
+                user_message=message,
+                current_code=current_code,
+                model_name=model_name,
+                use_structured_output=True)
+        except AIError as e:
+            if is_overload_error(e):
+                controller.record_err()
+            raise
+        controller.record_ok(time.monotonic() - start)
 
     # 7. Validate emotions in response
     if isinstance(response_json, dict) and isinstance(
@@ -4,7 +4,10 @@ AI Vtuber API Routes.
 This module provides the Flask Blueprint for AI Vtuber endpoints.
 """
 
-from flask import Blueprint, current_app
+import hashlib
+import json
+
+from flask import Blueprint, current_app, request
 
 from mongo import AiApiLog, Problem
 from model.auth import login_required
@@ -18,8 +21,11 @@ from .ai import (
     AIError,
     skin_api,
 )
+from .ai.coalesce import make_key, coalesced_call
 from .ai.vtuber import process_vtuber_request
 from .ai.conversation import get_conversation_history, reset_conversation_history
+from .ai.key_manager import resolve_course_key_and_model
+from .ai.logging import get_logger
 from .ai.testcase_generator import generate_testcase
 
 __all__ = ['ai_api', 'skin_api']
@@ -27,6 +33,15 @@ __all__ = ['ai_api', 'skin_api']
 ai_api = Blueprint('ai_api', __name__)
 
 
+def _map_ai_error(e, logger, tag):
+    """Map an AIError to its HTTP response (shared by the testcase handlers)."""
+    logger.warning(f"[{tag}] AI service error: {e}")
+    status_code = getattr(e, 'status_code', 500) or 500
+    if status_code == 429:
+        return HTTPError('API quota exceeded. Please try again later.', 429)
+    return HTTPError(str(e), status_code)
+
+
 @ai_api.route('/chatbot/ask', methods=['POST'])
 @login_required
 @Request.json('message', 'current_code', 'problem_id', 'course_name',
@@ -49,13 +64,20 @@ def ask(user=None,
         return HTTPError('Missing course_name', 400)
 
     # 2. Call AI Processing
+    # Identical concurrent prompts from the same user share a single
+    # upstream call (dedupes double-submits). The user is part of the
+    # key because the reply is built from the caller's private history,
+    # permission-checked per user, and saved to the leader's history.
+    key = make_key(user.username, course_name, str(problem_id), message,
+                   current_code or '', language or 'en')
     try:
-        response_data = process_vtuber_request(user=user,
-                                               course_name=course_name,
-                                               problem_id=problem_id,
-                                               message=message,
-                                               current_code=current_code,
-                                               language=language or 'en')
+        response_data = coalesced_call(
+            key, lambda: process_vtuber_request(user=user,
+                                                course_name=course_name,
+                                                problem_id=problem_id,
+                                                message=message,
+                                                current_code=current_code,
+                                                language=language or 'en'))
         current_app.logger.debug(f"AI Response Data: {response_data}")
         return HTTPResponse(data=response_data)
 
@@ -83,7 +105,14 @@ def history(user, course_name):
         return HTTPError('Missing course_name', 400)
 
     result = get_conversation_history(course_name, user.username)
-    return HTTPResponse(data=result)
+
+    # Conditional GET: clients polling an unchanged history get a bodyless
+    # 304 instead of re-downloading the whole conversation.
+    etag = hashlib.blake2b(json.dumps(result, ensure_ascii=False).encode(),
+                           digest_size=8).hexdigest()
+    if request.if_none_match.contains(etag):
+        return '', 304, {'ETag': f'"{etag}"'}
+    return HTTPResponse(data=result, etag=etag)
 
 
 @ai_api.route('/chatbot/history', methods=['DELETE'])
@@ -127,9 +156,6 @@ def generate_testcase_endpoint(user=None,
     Returns:
         JSON with input, expected_output, explanation
     """
-    from .ai.key_manager import get_available_key
-    from .ai.logging import get_logger
-
     logger = get_logger('testcase_api')
 
     logger.info(
@@ -151,18 +177,14 @@ def generate_testcase_endpoint(user=None,
             logger.error(f"[TestcaseGen] Problem not found: {problem_id}")
             return HTTPError('Problem not found', 404)
 
-        # Get API key using same logic as chatbot
-        key, error_msg = get_available_key(course_name)
+        # Get API key and model in one cached lookup (same logic as chatbot)
+        key, model, error_msg = resolve_course_key_and_model(course_name)
         if not key:
             logger.warning(f"[TestcaseGen] No API key available: {error_msg}")
             return HTTPError('No API key configured for this course', 400)
 
         api_key = key.key_value
         logger.info(f"[TestcaseGen] Using API key: {key.key_name}")
-
-        # Get model from course config (same as chatbot)
-        from .ai.key_manager import get_model_for_course
-        model = get_model_for_course(course_name)
         logger.info(f"[TestcaseGen] Using model: {model}")
 
         # Generate test case
@@ -183,12 +205,7 @@ def generate_testcase_endpoint(user=None,
         return HTTPError(str(e), 404)
     except AIError as e:
         # AIServiceError inherits from AIError
-        logger.warning(f"[TestcaseGen] AI service error: {e}")
-        status_code = getattr(e, 'status_code', 500)
-        if status_code == 429:
-            return HTTPError('API quota exceeded. Please try again later.',
-                             429)
-        return HTTPError(str(e), status_code)
+        return _map_ai_error(e, logger, 'TestcaseGen')
     except ValueError as e:
         logger.error(f"[TestcaseGen] ValueError: {e}")
         return HTTPError(str(e), 400)
@@ -227,9 +244,6 @@ def generate_testcase_for_teacher(user=None,
     Returns:
         JSON with testcases array containing input, expected_output, explanation
     """
-    from .ai.logging import get_logger
-    from .ai.key_manager import get_available_key, get_model_for_course
-
     logger = get_logger('testcase_teacher_api')
 
     logger.info(
@@ -260,20 +274,11 @@ def generate_testcase_for_teacher(user=None,
                 f"[TestcaseGenTeacher] Preparation failed: {error_msg}")
             return HTTPError(error_msg, 400)
     else:
-        # For new problems, just get the key
-        if api_key_id:
-            from mongo import AiApiKey
-            try:
-                key = AiApiKey(api_key_id)
-                if not key or not getattr(key, 'is_active', False):
-                    return HTTPError('API key not found or inactive', 400)
-            except Exception:
-                return HTTPError('API key not found', 400)
-        else:
-            key, error_msg = get_available_key(course_name)
-            if not key:
-                return HTTPError(error_msg or 'No API key available', 400)
-        model = get_model_for_course(course_name)
+        # For new problems, resolve key and model in one cached lookup
+        key, model, error_msg = resolve_course_key_and_model(
+            course_name, api_key_id)
+        if not key:
+            return HTTPError(error_msg or 'No API key available', 400)
 
     api_key = key.key_value
     logger.info(f"[TestcaseGenTeacher] Using API key: {key.key_name}")
@@ -299,12 +304,7 @@ def generate_testcase_for_teacher(user=None,
         logger.error(f"[TestcaseGenTeacher] Context not found: {e}")
         return HTTPError(str(e), 404)
     except AIError as e:
-        logger.warning(f"[TestcaseGenTeacher] AI service error: {e}")
-        status_code = getattr(e, 'status_code', 500)
-        if status_code == 429:
-            return HTTPError('API quota exceeded. Please try again later.',
-                             429)
-        return HTTPError(str(e), status_code)
+        return _map_ai_error(e, logger, 'TestcaseGenTeacher')
     except ValueError as e:
         logger.error(f"[TestcaseGenTeacher] ValueError: {e}")
         return HTTPError(str(e), 400)
@@ -3,7 +3,7 @@ from typing import Set, Callable, Any, Optional
 import csv
 import io
 from datetime import timezone, datetime
-from flask import Blueprint, request, current_app, url_for
+from flask import Blueprint, request, current_app, g, url_for
 from mongo import *
 from mongo import engine, Role
 from .utils import *
@@ -22,6 +22,16 @@ auth_api = Blueprint('auth_api', __name__)
 signup_limiter = RateLimiter()
 recovery_limiter = RateLimiter()
 
+
+@auth_api.before_request
+def _set_client_ip():
+    '''Resolve the client IP once per request; handlers read `g.client_ip`.
+    '''
+    g.client_ip = request.headers.get('cf-connecting-ip') or (
+        request.headers.get('x-forwarded-for')
+        or request.remote_addr or '').split(',')[0].strip()
+
+
 VERIFY_TEXT = '''\
 Welcome! you've signed up successfully!
 Enter Normal OJ to active your account via this link:
@@ -161,10 +171,9 @@ def validate_pat_request(required_scopes: list[str]) -> Any:
         return None  # No PAT provided
 
     pat_token = auth_header.split(' ', 1)[1]
-    token_hash = PersonalAccessToken.hash_token(pat_token)
 
     try:
-        pat_record = PersonalAccessToken.get_by_hash(token_hash)
+        pat_record = PersonalAccessToken.get_by_token(pat_token)
     except engine.DoesNotExist:
         return HTTPError('Token Invalid or Not Found', 401)
 
@@ -232,7 +241,7 @@ def session():
         if not isinstance(request.json, dict) or len(request.json) > 2:
             return HTTPError(
                 'Mass Assignment detected: extra fields not allowed', 400)
-        ip_addr = request.headers.get('cf-connecting-ip', request.remote_addr)
+        ip_addr = g.client_ip
 
         # Rate limit check
         allowed, wait_time = login_limiter.check(ip_addr)
@@ -264,7 +273,7 @@ def session():
 @auth_api.route('/signup', methods=['POST'])
 @Request.json('username: str', 'password: str', 'email: str')
 def signup(username, password, email):
-    ip_addr = request.headers.get('cf-connecting-ip', request.remote_addr)
+    ip_addr = g.client_ip
     if not current_app.config.get('TESTING', False):
         allowed, wait_time = signup_limiter.check(ip_addr)
         if not allowed:
@@ -294,7 +303,7 @@ def signup(username, password, email):
 @login_required
 @Request.json('old_password: str', 'new_password: str')
 def change_password(user, old_password, new_password):
-    ip_addr = request.headers.get('cf-connecting-ip', request.remote_addr)
+    ip_addr = g.client_ip
     try:
         User.login(user.username, old_password, ip_addr)
     except DoesNotExist:
@@ -304,6 +313,26 @@ def change_password(user, old_password, new_password):
     return HTTPResponse('Password Has Been Changed', cookies=cookies)
 
 
+def _check_username(username=None, email=None):
+    if not username:
+        return HTTPError('Missing username', 400)
+    valid = User.check_availability('username', username)
+    return HTTPResponse('Username Can Be Used' if valid else 'User Exists',
+                        data={'valid': int(valid)})
+
+
+def _check_email(username=None, email=None):
+    if not email:
+        return HTTPError('Missing email', 400)
+    valid = User.check_availability('email', email)
+    return HTTPResponse('Email Can Be Used' if valid else 'Email Has Been Used',
+                        data={'valid': int(valid)})
+
+
+# Built once at import time; `check` dispatches through this registry
+_CHECKERS = {'username': _check_username, 'email': _check_email}
+
+
 @auth_api.route('/check/<item>', methods=['POST'])
 @Request.json(vars_dict={'username': 'username', 'email': 'email'})
 def check(item, username=None, email=None):
@@ -312,27 +341,15 @@ def check(item, username=None, email=None):
     if not isinstance(request.json, dict) or len(request.json) > 1:
         return HTTPError('Extra fields not allowed', 400)
 
+    checker = _CHECKERS.get(item)
+    if checker is None:
+        return HTTPError('Invalid Checking Type', 400)
+
     try:
-        if item == 'username':
-            if not username:
-                return HTTPError('Missing username', 400)
-            valid = User.check_availability('username', username)
-            return HTTPResponse(
-                'Username Can Be Used' if valid else 'User Exists',
-                data={'valid': int(valid)})
-
-        if item == 'email':
-            if not email:
-                return HTTPError('Missing email', 400)
-            valid = User.check_availability('email', email)
-            return HTTPResponse(
-                'Email Can Be Used' if valid else 'Email Has Been Used',
-                data={'valid': int(valid)})
+        return checker(username=username, email=email)
     except ValueError as e:
         return HTTPError(str(e), 400)
 
-    return HTTPError('Invalid Checking Type', 400)
-
 
 @auth_api.route('/resend-email', methods=['POST'])
 @Request.json('email: str')
@@ -397,7 +414,7 @@ def active(token=None):
 @auth_api.route('/password-recovery', methods=['POST'])
 @Request.json('email: str')
 def password_recovery(email):
-    ip_addr = request.headers.get('cf-connecting-ip', request.remote_addr)
+    ip_addr = g.client_ip
     if not current_app.config.get('TESTING', False):
         allowed, wait_time = recovery_limiter.check(ip_addr)
         if not allowed:
@@ -1,11 +1,11 @@
 from typing import Dict
-from mongo import Problem
 from flask import Blueprint, request, current_app
 from mongo.copycat_service import (
     build_student_dict,
-    collect_submission_paths,
+    collect_submission_paths_cached,
     get_course,
     get_problem,
+    get_problem_report_state,
     has_grade_permission,
     mark_report_requested,
     require_moss_userid,
@@ -18,32 +18,90 @@ import mosspy
 import threading
 import logging
 import requests
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter, Retry
 import re
 
 __all__ = ['copycat_api']
 
 copycat_api = Blueprint('copycat_api', __name__)
 
+# Shared keep-alive session for fetching MOSS report pages: both report
+# fetches of a request hit the same host, so pooling skips a TLS handshake
+# per call.
+_MOSS_SESSION = requests.Session()
+_moss_adapter = HTTPAdapter(pool_connections=4,
+                            pool_maxsize=16,
+                            max_retries=Retry(total=2, backoff_factor=0.2))
+_MOSS_SESSION.mount('https://', _moss_adapter)
+_MOSS_SESSION.mount('http://', _moss_adapter)
+# (connect, read) timeout so a hung MOSS server cannot stall the worker
+_MOSS_TIMEOUT = (3.05, 15)
+
+# Bounded pool for report generation: MOSS rate-limits anyway, so extra
+# concurrency gains nothing while unbounded threads would pile up under a
+# deadline burst. A set of in-flight problem ids dedupes repeated POSTs.
+_REPORT_POOL = ThreadPoolExecutor(max_workers=2, thread_name_prefix='moss')
+_INFLIGHT_REPORTS = set()
+_INFLIGHT_LOCK = threading.Lock()
+
+# Compiled once at import; is_valid_url runs per MOSS response
+_URL_RE = re.compile(
+    r'^https?://'  # http:// or https://
+    r'(?:(?:[A-Z0-9](?:[A-Z0-9-]{0,61}[A-Z0-9])?\.)+[A-Z]{2,6}\.?|'  # domain...
+    r'localhost|'  # localhost...
+    r'\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3})'  # ...or ip
+    r'(?::\d+)?'  # optional port
+    r'(?:/?|[/?]\S+)$',
+    re.IGNORECASE)
+
 
 def is_valid_url(url):
-    import re
-    regex = re.compile(
-        r'^https?://'  # http:// or https://
-        r'(?:(?:[A-Z0-9](?:[A-Z0-9-]{0,61}[A-Z0-9])?\.)+[A-Z]{2,6}\.?|'  # domain...
-        r'localhost|'  # localhost...
-        r'\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3})'  # ...or ip
-        r'(?::\d+)?'  # optional port
-        r'(?:/?|[/?]\S+)$',
-        re.IGNORECASE)
-    return url is not None and regex.search(url)
+    return url is not None and _URL_RE.search(url) is not None
+
+
+def _prefetch_files(paths):
+    """
+    Read the submission files concurrently to warm the page cache, so
+    mosspy's strictly sequential send() loop doesn't wait on disk between
+    network round-trips.
+    """
+    if not paths:
+        return
+
+    def read(path):
+        try:
+            with open(path, 'rb') as f:
+                f.read()
+        except OSError:
+            pass
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        list(executor.map(read, paths))
+
+
+def _run_moss(moss_userid, lang, files: Dict, logger) -> str:
+    moss = mosspy.Moss(moss_userid, lang)
+    for username, code_path in files.items():
+        logger.info(f'send {username} {code_path}')
+        moss.addFile(code_path)
+    response = moss.send()
+    if is_valid_url(response):
+        return response
+    logger.info(f"[copycat] {response}")
+    return ''
 
 
 def get_report_task(user, problem_id, student_dict: Dict, moss_userid=None):
-    last_cc_submission, last_python_submission = collect_submission_paths(
-        user,
-        problem_id,
-        student_dict,
-    )
+    last_cc_submission, last_python_submission = (
+        collect_submission_paths_cached(
+            user,
+            problem_id,
+            student_dict,
+        ))
+    _prefetch_files(
+        list(last_cc_submission.values()) +
+        list(last_python_submission.values()))
 
     if moss_userid is None:
         moss_userid = require_moss_userid()
@@ -57,37 +115,22 @@ def get_report_task(user, problem_id, student_dict: Dict, moss_userid=None):
         logger.info(f"[copycat] problem not found: {problem_id}")
         return
 
-    cpp_report_url = ''
-    python_report_url = ''
-    # check for c or cpp code
+    # allowed_language is a bitmask: 0b001 c, 0b010 cpp, 0b100 python
+    jobs = []
     if problem.allowed_language != 4:
-        m1 = mosspy.Moss(moss_userid, "cc")
-
-        for user, code_path in last_cc_submission.items():
-            logger.info(f'send {user} {code_path}')
-            m1.addFile(code_path)
-
-        response = m1.send()
-        if is_valid_url(response):
-            cpp_report_url = response
-        else:
-            logger.info(f"[copycat] {response}")
-            cpp_report_url = ''
-
-    # check for python code
+        jobs.append(('cc', last_cc_submission))
     if problem.allowed_language >= 4:
-        m2 = mosspy.Moss(moss_userid, "python")
-
-        for user, code_path in last_python_submission.items():
-            logger.info(f'send {user} {code_path}')
-            m2.addFile(code_path)
-
-        response = m2.send()
-        if is_valid_url(response):
-            python_report_url = response
-        else:
-            logger.info(f"[copycat] {response}")
-            python_report_url = ''
+        jobs.append(('python', last_python_submission))
+
+    # one MOSS run per applicable language, in parallel when both apply
+    with ThreadPoolExecutor(max_workers=len(jobs)) as executor:
+        futures = {
+            lang: executor.submit(_run_moss, moss_userid, lang, files, logger)
+            for lang, files in jobs
+        }
+        urls = {lang: future.result() for lang, future in futures.items()}
+    cpp_report_url = urls.get('cc', '')
+    python_report_url = urls.get('python', '')
 
     # download report from moss
     if cpp_report_url != '':
@@ -116,7 +159,7 @@ def get_report_task(user, problem_id, student_dict: Dict, moss_userid=None):
 
 def get_report_by_url(url: str):
     try:
-        response = requests.get(url)
+        response = _MOSS_SESSION.get(url, timeout=_MOSS_TIMEOUT)
         return response.text
     except (requests.exceptions.MissingSchema,
             requests.exceptions.InvalidSchema):
@@ -125,23 +168,12 @@ def get_report_by_url(url: str):
 
 @copycat_api.route('/', methods=['GET'])
 @login_required
-@Request.args('course', 'problem_id')
+@Request.args('course: str', 'problem_id: int')
 def get_report(user, course, problem_id):
-    if not (problem_id and course):
-        return HTTPError(
-            'missing arguments! (In HTTP GET argument format)',
-            400,
-            data={
-                'need': ['course', 'problemId'],
-            },
-        )
     # some privilege or exist check
-    try:
-        problem = Problem(int(problem_id))
-    except ValueError:
-        return HTTPError('problemId must be integer', 400)
-
-    if not problem:
+    # One projected query covers the existence check and report fields
+    report_state = get_problem_report_state(problem_id)
+    if report_state is None:
         return HTTPError('Problem not exist.', 404)
     course = get_course(course)
     if not course:
@@ -149,42 +181,42 @@ def get_report(user, course, problem_id):
     if not has_grade_permission(course, user):
         return HTTPError('Forbidden.', 403)
 
-    cpp_report_url = problem.cpp_report_url
-    python_report_url = problem.python_report_url
+    cpp_report_url = report_state.cpp_report_url
+    python_report_url = report_state.python_report_url
 
-    if problem.moss_status == 0:
+    if report_state.moss_status == 0:
         return HTTPError(
             "No report found. Please make a post request to copycat api to generate a report",
             404,
             data={},
         )
-    elif problem.moss_status == 1:
+    elif report_state.moss_status == 1:
         return HTTPResponse("Report generating...", data={})
     else:
-        cpp_report = get_report_by_url(cpp_report_url)
-        python_report = get_report_by_url(python_report_url)
-        return HTTPResponse(
-            "Success.",
-            data={
-                "cpp_report": cpp_report,
-                "python_report": python_report
-            },
-        )
+        # Hand the MOSS URLs to the client by default so the browser can
+        # fetch the (multi-hundred-KB) pages itself; only proxy the HTML
+        # bodies through this worker when the client asks for text/html.
+        data = {
+            "cpp_report_url": cpp_report_url,
+            "python_report_url": python_report_url,
+        }
+        if 'text/html' in request.headers.get('Accept', ''):
+            # Fetch both report pages in parallel; they are independent
+            # round trips sharing _MOSS_SESSION's connection pool.
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                cpp_future = executor.submit(get_report_by_url,
+                                             cpp_report_url)
+                python_future = executor.submit(get_report_by_url,
+                                                python_report_url)
+                data["cpp_report"] = cpp_future.result()
+                data["python_report"] = python_future.result()
+        return HTTPResponse("Success.", data=data)
 
 
 @copycat_api.route('/', methods=['POST'])
 @login_required
-@Request.json('course', 'problem_id', 'student_nicknames')
+@Request.json('course: str', 'problem_id: int', 'student_nicknames: dict')
 def detect(user, course, problem_id, student_nicknames):
-    if not (problem_id and course and type(student_nicknames) is dict):
-        return HTTPError(
-            'missing arguments! (In Json format)',
-            400,
-            data={
-                'need': ['course', 'problemId', 'studentNicknames'],
-            },
-        )
-
     course = get_course(course)
     problem = get_problem(problem_id)
 
@@ -211,15 +243,26 @@ def detect(user, course, problem_id, student_nicknames):
 
     mark_report_requested(problem_id)
     if not current_app.config['TESTING']:
-        threading.Thread(
-            target=get_report_task,
-            args=(
-                user,
-                problem_id,
-                student_dict,
-                moss_userid,
-            ),
-        ).start()
+        with _INFLIGHT_LOCK:
+            if problem_id in _INFLIGHT_REPORTS:
+                # a report for this problem is already being generated
+                return HTTPResponse('Success.')
+            _INFLIGHT_REPORTS.add(problem_id)
+        _REPORT_POOL.submit(
+            _run_report_task,
+            user,
+            problem_id,
+            student_dict,
+            moss_userid,
+        )
 
     # return Success
     return HTTPResponse('Success.')
+
+
+def _run_report_task(user, problem_id, student_dict, moss_userid):
+    try:
+        get_report_task(user, problem_id, student_dict, moss_userid)
+    finally:
+        with _INFLIGHT_LOCK:
+            _INFLIGHT_REPORTS.discard(problem_id)
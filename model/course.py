@@ -1,5 +1,6 @@
 from typing import Optional
-import math
+import hashlib
+import json
 from flask import Blueprint, request, current_app
 
 from mongo import *
@@ -16,30 +17,41 @@ __all__ = ['course_api']
 course_api = Blueprint('course_api', __name__)
 
 
+def _is_valid_score_title(title) -> bool:
+    # titles are Mongo field keys now, so path characters are off-limits
+    return bool(title) and '.' not in title and not title.startswith('$')
+
+
+def _is_course_manager(course, user) -> bool:
+    '''
+    Course teacher or admin (TAs excluded): the roles allowed to manage
+    course membership.
+    '''
+    return course.obj.teacher.pk == user.pk or user.role == Role.ADMIN
+
+
+def _payload_etag(data) -> str:
+    '''
+    Weak content hash for conditional GET on pollable endpoints.
+    '''
+    return hashlib.blake2b(
+        json.dumps(data, ensure_ascii=False, sort_keys=True).encode(),
+        digest_size=8,
+    ).hexdigest()
+
+
 @course_api.get('/')
 @login_required(pat_scope=['read:courses'])
 def get_courses(user):
-    data = [{
-        'course': c.course_name,
-        'teacher': c.teacher.info,
-        'color': c.color,
-        'emoji': c.emoji,
-    } for c in Course.get_user_courses(user)]
-    return HTTPResponse('Success.', data=data)
+    return HTTPResponse('Success.', data=Course.list_cards(user))
 
 
 @course_api.get('/summary')
 @identity_verify(0)
 def get_courses_summary(user):
-    courses = [Course(c) for c in Course.get_all()]
-    summary = {"courseCount": len(courses), "breakdown": []}
-
-    for course in courses:
-        # The user is admin, it won't filter out any problems (it's required)
-        problems = Problem.get_problem_list(user, course=course.course_name)
-        course_summary = course.get_course_summary(problems)
-        course_summary["problemCount"] = len(problems)
-        summary["breakdown"].append(course_summary)
+    # The user is admin, it won't filter out any problems (it's required)
+    breakdown = Course.get_all_summaries(user)
+    summary = {"courseCount": len(breakdown), "breakdown": breakdown}
 
     return HTTPResponse("Success.", data=summary)
 
@@ -115,15 +127,21 @@ def get_course(user, course_name):
         else:
             tas = []
             for ta in TAs:
-                permit_user = User(ta).obj
-                if not User(ta):
+                permit_user = User(ta)
+                if not permit_user:
                     return HTTPResponse(f'User: {ta} not found.', 404)
-                tas.append(permit_user)
-
-            for permit_user in set(course.tas) - set(tas):
-                course.remove_user(permit_user)
-            for permit_user in set(tas) - set(course.tas):
-                course.add_user(permit_user)
+                tas.append(permit_user.obj)
+
+            # diff by pk so set operations hash usernames, not whole
+            # user documents, then apply each side as one bulk update
+            current = {t.pk for t in course.tas}
+            new = {t.pk for t in tas}
+            if (removed := current - new):
+                engine.User.objects(username__in=list(removed)).update(
+                    pull__courses=course.id)
+            if (added := new - current):
+                engine.User.objects(username__in=list(added)).update(
+                    add_to_set__courses=course.id)
             course.tas = tas
 
         try:
@@ -133,13 +151,25 @@ def get_course(user, course_name):
         return HTTPResponse('Success.')
 
     if request.method == 'GET':
+        # one query covers the teacher, TAs and every student; entries
+        # without a matching user document (stale nicknames, dangling
+        # references) fall back to a minimal info dict instead of 500
+        infos = User.get_infos([
+            course.teacher.username,
+            *(ta.username for ta in course.tas),
+            *course.student_nicknames,
+        ])
+
+        def info_of(username):
+            return infos.get(username) or {'username': username}
+
         return HTTPResponse(
             'Success.',
             data={
-                "teacher": course.teacher.info,
-                "TAs": [ta.info for ta in course.tas],
+                "teacher": info_of(course.teacher.username),
+                "TAs": [info_of(ta.username) for ta in course.tas],
                 "students":
-                [User(name).info for name in course.student_nicknames],
+                [info_of(name) for name in course.student_nicknames],
                 "color": course.color,
                 "emoji": course.emoji,
             },
@@ -166,12 +196,10 @@ def change_member_role(user, course_name, username, role):
         return HTTPError('Course not found.', 404)
 
     # Only course teacher or admin can change roles (not TAs)
-    is_course_teacher = (course.obj.teacher.pk == user.pk)
-    is_admin = (user.role == Role.ADMIN)
-    is_global_teacher_ta = (user.role == Role.TEACHER and user.pk
-                            in [ta.pk for ta in (course.tas or [])])
+    is_global_teacher_ta = (user.role == Role.TEACHER
+                            and user.pk in course.ta_pk_set)
 
-    if not (is_course_teacher or is_admin or is_global_teacher_ta):
+    if not (_is_course_manager(course, user) or is_global_teacher_ta):
         return HTTPError(
             'Only course teacher or admin can change member roles.', 403)
 
@@ -188,33 +216,35 @@ def change_member_role(user, course_name, username, role):
         return HTTPError('Invalid role. Must be "student" or "ta".', 400)
 
     # Check if user is in the course
-    is_ta = target_user.obj in course.tas
-    is_student = username in course.student_nicknames
+    is_ta = target_user.pk in course.ta_pk_set
+    is_student = username in course.student_set
 
     if not (is_ta or is_student):
         return HTTPError('User is not a member of this course.', 400)
 
-    # Perform role change
+    # Perform role change with targeted updates instead of rewriting the
+    # TA list and nickname map
     if role == 'ta':
         if is_ta:
             return HTTPResponse('User is already a TA.')
         # Move from student to TA
+        updates = {'add_to_set__tas': target_user.obj}
         if is_student:
-            del course.student_nicknames[username]
-        if target_user.obj not in course.tas:
-            course.tas.append(target_user.obj)
-            course.add_user(target_user.obj)
+            updates[f'unset__student_nicknames__{username}'] = 1
+        course.update(**updates)
+        course.add_user(target_user.obj)
     elif role == 'student':
         if is_student and not is_ta:
             return HTTPResponse('User is already a student.')
         # Move from TA to student
+        updates = {}
         if is_ta:
-            course.tas = [ta for ta in course.tas if ta != target_user.obj]
-        if username not in course.student_nicknames:
-            course.student_nicknames[username] = username
+            updates['pull__tas'] = target_user.obj
+        if not is_student:
+            updates[f'set__student_nicknames__{username}'] = username
             course.add_user(target_user.obj)
+        course.update(**updates)
 
-    course.save()
     return HTTPResponse('Role updated successfully.',
                         data={
                             'username': username,
@@ -236,10 +266,7 @@ def remove_course_member(user, course_name, username):
         return HTTPError('Course not found.', 404)
 
     # Only course teacher or admin can remove members (not TAs)
-    is_course_teacher = (course.obj.teacher.pk == user.pk)
-    is_admin = (user.role == Role.ADMIN)
-
-    if not (is_course_teacher or is_admin):
+    if not _is_course_manager(course, user):
         return HTTPError('Only course teacher or admin can remove members.',
                          403)
 
@@ -252,23 +279,22 @@ def remove_course_member(user, course_name, username):
         return HTTPError('Cannot remove course teacher.', 400)
 
     # Check if user is in the course
-    is_ta = target_user.obj in course.tas
-    is_student = username in course.student_nicknames
+    is_ta = target_user.pk in course.ta_pk_set
+    is_student = username in course.student_set
 
     if not (is_ta or is_student):
         return HTTPError('User is not a member of this course.', 400)
 
-    # Remove from TAs if applicable
+    # Drop the membership with one targeted update
+    updates = {}
     if is_ta:
-        course.tas = [ta for ta in course.tas if ta != target_user.obj]
-
-    # Remove from students if applicable
+        updates['pull__tas'] = target_user.obj
     if is_student:
-        del course.student_nicknames[username]
+        updates[f'unset__student_nicknames__{username}'] = 1
+    course.update(**updates)
 
     # Remove course from user's course list
     course.remove_user(target_user.obj)
-    course.save()
 
     return HTTPResponse('Member removed successfully.',
                         data={'username': username})
@@ -290,41 +316,38 @@ def add_existing_members(user, course_name, usernames):
         return HTTPError('Course not found.', 404)
 
     # Only course teacher or admin can add members
-    is_course_teacher = (course.obj.teacher.pk == user.pk)
-    is_admin = (user.role == Role.ADMIN)
-
-    if not (is_course_teacher or is_admin):
+    if not _is_course_manager(course, user):
         return HTTPError('Only course teacher or admin can add members.', 403)
 
     if not usernames or not isinstance(usernames, list):
         return HTTPError('usernames must be a non-empty list.', 400)
 
+    # one $in query instead of one lookup per name
+    users = {
+        u.username
+        for u in engine.User.objects(username__in=usernames).only('username')
+    }
+    member_usernames = course.get_member_usernames()
+
     added = []
     already_in = []
     not_found = []
 
     for username in usernames:
-        target_user = User(username)
-        if not target_user:
+        if username not in users:
             not_found.append(username)
-            continue
-
-        # Check if user is already in the course
-        is_ta = target_user.obj in course.tas
-        is_student = username in course.student_nicknames
-        is_teacher = target_user.obj == course.teacher
-
-        if is_ta or is_student or is_teacher:
+        elif username in member_usernames:
             already_in.append(username)
-            continue
-
-        # Add user as student
-        course.student_nicknames[username] = username
-        course.add_user(target_user.obj)
-        added.append(username)
+        else:
+            member_usernames.add(username)
+            added.append(username)
 
     if added:
-        course.save()
+        # two bulk updates: attach the course to every new student and
+        # extend the nickname map, without rewriting the course document
+        engine.User.objects(username__in=added).update(
+            add_to_set__courses=course.id)
+        course.update(**{f'set__student_nicknames__{n}': n for n in added})
 
     return HTTPResponse('Users processed.',
                         data={
@@ -351,38 +374,34 @@ def search_users_for_course(user, course_name, q):
         return HTTPError('Course not found.', 404)
 
     # Only course teacher or admin can search
-    is_course_teacher = (course.obj.teacher.pk == user.pk)
-    is_admin = (user.role == Role.ADMIN)
-
-    if not (is_course_teacher or is_admin):
+    if not _is_course_manager(course, user):
         return HTTPError('Only course teacher or admin can search users.', 403)
 
-    if not q or len(q) < 1:
+    # require at least 2 characters so the query stays an indexable prefix
+    # match instead of an effectively unbounded scan
+    if not q or len(q.strip()) < 2:
         return HTTPResponse('No search query.', data=[])
+    q = q.strip()
 
-    # Search users by username or email
-    matching_users = User.search(q)
-
-    # Get current course members
-    member_usernames = course.get_member_usernames()
+    # Search users by username or email, excluding current members in Mongo
+    matching_users = User.search(
+        q, exclude_usernames=course.member_username_set)
 
-    # Filter out existing members
     results = []
     for u in matching_users:
-        if u.username not in member_usernames:
-            # role is already an int or Enum that behaves like int
-            role_val = u.role
-            if hasattr(role_val, 'value'):
-                role_val = role_val.value
-
-            results.append({
-                'username':
-                u.username,
-                'displayedName':
-                u.profile.displayed_name if u.profile else u.username,
-                'role':
-                role_val if role_val is not None else 2
-            })
+        # role is already an int or Enum that behaves like int
+        role_val = u.role
+        if hasattr(role_val, 'value'):
+            role_val = role_val.value
+
+        results.append({
+            'username':
+            u.username,
+            'displayedName':
+            u.profile.displayed_name if u.profile else u.username,
+            'role':
+            role_val if role_val is not None else 2
+        })
 
     return HTTPResponse('Success.', data=results)
 
@@ -396,7 +415,7 @@ def manage_course_code(user, course_name):
     POST: Generate a new course code
     DELETE: Remove course code (disable joining by code)
     """
-    course = Course(course_name)
+    course = Course.lightweight(course_name, 'course_code', 'auth_codes')
 
     if not course:
         return HTTPError('Course not found.', 404)
@@ -443,8 +462,7 @@ def manage_course_code(user, course_name):
             else:
                 # Generate a new course code (Legacy)
                 new_code = Course.generate_course_code()
-                course.course_code = new_code
-                course.save()
+                course.update(course_code=new_code)
                 return HTTPResponse('Course code generated.',
                                     data={'course_code': new_code})
 
@@ -452,8 +470,7 @@ def manage_course_code(user, course_name):
 
     elif request.method == 'DELETE':
         # Remove course code (Legacy)
-        course.course_code = None
-        course.save()
+        course.update(unset__course_code=1)
         return HTTPResponse('Course code removed.')
 
 
@@ -463,7 +480,7 @@ def delete_course_code(user, course_name, code):
     """
     Remove specific authorization code.
     """
-    course = Course(course_name)
+    course = Course.lightweight(course_name)
     if not course:
         return HTTPError('Course not found.', 404)
 
@@ -487,77 +504,77 @@ def grading(user, course_name, student):
         return HTTPError('Course not found.', 404)
     if not course.permission(user, Course.Permission.VIEW):
         return HTTPError('You are not in this course.', 403)
-    if student not in course.student_nicknames.keys():
+    if student not in course.student_set:
         return HTTPError('The student is not in the course.', 404)
     if course.permission(user, Course.Permission.SCORE) and \
         (user.username != student or request.method != 'GET'):
         return HTTPError('You can only view your score.', 403)
 
-    def get_score():
+    # branch before defining the handler so each request only builds the
+    # closure it actually dispatches to
+    if request.method == 'GET':
         return HTTPResponse(
             'Success.',
             data=[{
-                'title': score['title'],
-                'content': score['content'],
-                'score': score['score'],
-                'timestamp': score['timestamp'].timestamp()
-            } for score in course.student_scores.get(student, [])])
-
-    @Request.json('title', 'content', 'score')
-    def add_score(title, content, score):
-        score_list = course.student_scores.get(student, [])
-        if title in [score['title'] for score in score_list]:
-            return HTTPError('This title is taken.', 400)
-        score_list.append({
-            'title': title,
-            'content': content,
-            'score': score,
-            'timestamp': datetime.now()
-        })
-        course.student_scores[student] = score_list
-        course.save()
-        return HTTPResponse('Success.')
+                'title': title,
+                'content': entry['content'],
+                'score': entry['score'],
+                'timestamp': entry['timestamp'].timestamp()
+            } for title, entry in course.student_scores.get(student,
+                                                            {}).items()])
 
-    @Request.json('title', 'new_title', 'content', 'score')
-    def modify_score(title, new_title, content, score):
-        score_list = course.student_scores.get(student, [])
-        title_list = [score['title'] for score in score_list]
-        if title not in title_list:
-            return HTTPError('Score not found.', 404)
-        index = title_list.index(title)
-        if new_title is not None:
-            if new_title in title_list:
+    elif request.method == 'POST':
+
+        @Request.json('title', 'content', 'score')
+        def add_score(title, content, score):
+            if not _is_valid_score_title(title):
+                return HTTPError('Not allowed title.', 400)
+            added = course.push_score(student, title, {
+                'content': content,
+                'score': score,
+                'timestamp': datetime.now()
+            })
+            if not added:
                 return HTTPError('This title is taken.', 400)
-            title = new_title
-        score_list[index] = {
-            'title': title,
-            'content': content,
-            'score': score,
-            'timestamp': datetime.now()
-        }
-        course.student_scores[student] = score_list
-        course.save()
-        return HTTPResponse('Success.')
+            return HTTPResponse('Success.')
+
+        return add_score()
+
+    elif request.method == 'PUT':
+
+        @Request.json('title', 'new_title', 'content', 'score')
+        def modify_score(title, new_title, content, score):
+            scores = course.student_scores.get(student, {})
+            if title not in scores:
+                return HTTPError('Score not found.', 404)
+            old_title = title
+            if new_title is not None:
+                if new_title in scores:
+                    return HTTPError('This title is taken.', 400)
+                if not _is_valid_score_title(new_title):
+                    return HTTPError('Not allowed title.', 400)
+                title = new_title
+            course.update_score(student,
+                                title, {
+                                    'content': content,
+                                    'score': score,
+                                    'timestamp': datetime.now()
+                                },
+                                old_title=old_title)
+            return HTTPResponse('Success.')
+
+        return modify_score()
 
-    @Request.json('title')
-    def delete_score(title):
-        score_list = course.student_scores.get(student, [])
-        title_list = [score['title'] for score in score_list]
-        if title not in title_list:
-            return HTTPError('Score not found.', 404)
-        index = title_list.index(title)
-        del score_list[index]
-        course.student_scores[student] = score_list
-        course.save()
-        return HTTPResponse('Success.')
+    else:
 
-    methods = {
-        'GET': get_score,
-        'POST': add_score,
-        'PUT': modify_score,
-        'DELETE': delete_score
-    }
-    return methods[request.method]()
+        @Request.json('title')
+        def delete_score(title):
+            if title not in course.student_scores.get(student, {}):
+                return HTTPError('Score not found.', 404)
+            course.pull_score(student, title)
+            return HTTPResponse('Success.')
+
+        return delete_score()
 
 
 @course_api.route('/<course_name>/scoreboard', methods=['GET'])
@@ -593,9 +610,16 @@ def get_course_scoreboard(
 
     ret = course.get_scoreboard(pids, start, end)
 
+    # Conditional GET: the scoreboard is polled by the whole class and the
+    # payload grows with students x problems, so unchanged boards are
+    # answered with a bodyless 304 instead of re-serializing every row.
+    etag = _payload_etag(ret)
+    if request.if_none_match.contains(etag):
+        return '', 304, {'ETag': f'"{etag}"'}
     return HTTPResponse(
         'Success.',
         data=ret,
+        etag=etag,
     )
 
 
@@ -605,7 +629,7 @@ def get_course_ai_settings(user, course_name):
     """
     Get Course AI Settings
     """
-    course = Course(course_name)
+    course = Course.lightweight(course_name, 'is_ai_vt_enabled', 'ai_model')
     if not course:
         return HTTPError('Course not found', 404)
 
@@ -626,7 +650,7 @@ def get_course_ai_usage(user, course_name):
     """
     [Teacher Only] 取得 AI Key 使用量統計頁面資料
     """
-    course = Course(course_name)
+    course = Course.lightweight(course_name)
     if not course:
         return HTTPError('Course not found', 404)
 
@@ -635,7 +659,14 @@ def get_course_ai_usage(user, course_name):
 
     try:
         keys_data = AiApiKey.get_keys_usage_by_course(course_name)
-        return HTTPResponse('Get usage success', data={'keys': keys_data})
+        # Conditional GET: the dashboard polls this page, so an unchanged
+        # payload is answered with a bodyless 304.
+        etag = _payload_etag(keys_data)
+        if request.if_none_match.contains(etag):
+            return '', 304, {'ETag': f'"{etag}"'}
+        return HTTPResponse('Get usage success',
+                            data={'keys': keys_data},
+                            etag=etag)
 
     except Exception as e:
         current_app.logger.error(f"Error getting AI key usage: {str(e)}")
@@ -649,7 +680,7 @@ def course_ai_key_entry(user, course_name):
     GET:    Get AI API Keys for a course.
     POST:   New AI API Key
     """
-    course = Course(course_name)
+    course = Course.lightweight(course_name)
 
     if not course:
         return HTTPError('Course not found', 404)
@@ -658,10 +689,13 @@ def course_ai_key_entry(user, course_name):
         return HTTPError('Permission denied', 403)
 
     # ===== GET: Retrieve Keys =====
-    def get_keys():
+    if request.method == 'GET':
         try:
             keys = AiApiKey.get_list_by_course(course_name)
-            return HTTPResponse('Success', data={'keys': keys})
+            etag = _payload_etag(keys)
+            if request.if_none_match.contains(etag):
+                return '', 304, {'ETag': f'"{etag}"'}
+            return HTTPResponse('Success', data={'keys': keys}, etag=etag)
         except Exception as e:
             return HTTPError(str(e), 500)
 
@@ -681,6 +715,7 @@ def course_ai_key_entry(user, course_name):
                                        created_by=user,
                                        is_active=is_active)
 
+            AiApiKey.invalidate_list_cache(course_name)
             return HTTPResponse('Key added.', data={'id': str(new_key.id)})
         except ValueError as ve:
             current_app.logger.error(f"ValueError adding AI key: {str(ve)}")
@@ -691,11 +726,7 @@ def course_ai_key_entry(user, course_name):
             current_app.logger.error(f"Error adding AI key: {str(e)}")
             return HTTPError(str(e), 500)
 
-    # ===== Method Dispatch =====
-    if request.method == 'GET':
-        return get_keys()
-    elif request.method == 'POST':
-        return add_key()
+    return add_key()
 
 
 @course_api.route('/<course_name>/ai/key/<key_id>',
@@ -706,29 +737,26 @@ def manage_course_ai_key(user, course_name, key_id):
     Delete or Update an AI API Key for a course.
     """
     # Common Checks
-    course = Course(course_name)
+    course = Course.lightweight(course_name)
     if not course:
         return HTTPError('Course not found', 404)
 
-    if user.role != Role.ADMIN:
-        is_teacher = (course.obj.teacher.pk == user.pk)
-        is_ta = any(ta.pk == user.pk for ta in course.obj.tas)
-
-        if not (is_teacher or is_ta):
-            return HTTPError('Permission denied', 403)
+    if not course.check_privilege(user):
+        return HTTPError('Permission denied', 403)
 
-    key = AiApiKey.get_key_by_id(key_id)
+    key, belongs = AiApiKey.get_key_scoped(key_id, course.obj)
     if not key:
         return HTTPError('Key not found', 404)
 
-    if key.course_name != course.obj:
+    if not belongs:
         return HTTPError('Key does not belong to this course', 403)
 
     # DELETE
-    def delete_key():
+    if request.method == 'DELETE':
         try:
             success = AiApiKey.delete_key(key_id)
             if success:
+                AiApiKey.invalidate_list_cache(course_name)
                 return HTTPResponse('Key deleted.')
             else:
                 return HTTPError('Delete failed', 500)
@@ -753,6 +781,7 @@ def manage_course_ai_key(user, course_name, key_id):
         try:
             success = AiApiKey.update_key(key_id, **update_fields)
             if success:
+                AiApiKey.invalidate_list_cache(course_name)
                 return HTTPResponse('Key updated.')
             else:
                 return HTTPError('Update failed', 500)
@@ -763,10 +792,7 @@ def manage_course_ai_key(user, course_name, key_id):
                 return HTTPError('Key name already exists', 400)
             return HTTPError(str(e), 500)
 
-    if request.method == 'DELETE':
-        return delete_key()
-    elif request.method == 'PATCH':
-        return update_key()
+    return update_key()
 
 
 @course_api.route('/<course_name>/ai/key/suggestion', methods=['GET'])
@@ -782,7 +808,7 @@ def get_key_suggestion(user, course_name, model):
     # Calculation:
     # - Effective RPM (with safety buffer): 15 * 0.5 = 7.5 RPM
     # - Suggested Keys = ceil(120 / 7.5) = 16 keys
-    course = Course(course_name)
+    course = Course.lightweight(course_name)
     if not course:
         return HTTPError('Course not found', 404)
 
@@ -809,10 +835,11 @@ def get_key_suggestion(user, course_name, model):
 
     # 4. Calculate Suggested Key Count
     safety_factor = 0.5  # 50% of RPM to be safe
-    effective_rpm = max(1, rpm_limit * safety_factor)
-
-    suggested_count = math.ceil(student_count / effective_rpm)
-    suggested_count = max(1, suggested_count)
+    # integer ceiling of student_count / max(1, rpm_limit * 0.5), with the
+    # halving folded into the numerator to stay in int arithmetic
+    effective_rpm_num = max(2, rpm_limit)
+    suggested_count = max(
+        1, -(-student_count * 2 // effective_rpm_num))
 
     return HTTPResponse(
         'Success',
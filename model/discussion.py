@@ -1,5 +1,5 @@
 from flask import Blueprint, current_app
-from mongo import Problem
+from mongo import Problem, User
 from .auth import login_required
 from .utils import Request, HTTPResponse, HTTPError
 from mongo.discussion import Discussion
@@ -20,22 +20,63 @@ def _filter_response_data(data, allowed_keys):
     return {k: data[k] for k in allowed_keys if k in data}
 
 
-def format_discussion_post(post):
+# exact-message HTTP status tables, one per handler: indexing beats
+# re-scanning every error string, and new messages fall to the default
+_CREATE_ERR_STATUS = {
+    'Insufficient permission.': 403,
+    'Posting code is not allowed before deadline.': 403,
+}
+_REPLY_ERR_STATUS = {
+    'Post not found.': 404,
+    'Reply_To target not found.': 404,
+}
+_LIKE_ERR_STATUS = {
+    'Post not found.': 404,
+    'Target not found.': 404,
+}
+_STATUS_ERR_STATUS = {
+    'Unsupported action.': 400,
+}
+_DELETE_ERR_STATUS = {
+    'Post not found.': 404,
+    'Reply not found.': 404,
+    'Invalid type.': 400,
+}
+
+
+def _clamp_int(raw, default, lo, hi):
+    # shared paging clamp: empty -> default, otherwise bounded int
+    if not raw:
+        return default
+    value = int(raw)
+    return lo if value < lo else hi if value > hi else value
+
+
+def _author_pk(post) -> str:
+    # the user pk is the username, so the raw reference already holds it
+    author = post._data.get('author')
+    if author is None:
+        return ''
+    return getattr(author, 'pk', getattr(author, 'id', author)) or ''
+
+
+def format_discussion_post(post, author_infos=None, liked_ids=None):
     # (保持你目前的 format_discussion_post 邏輯)
     author_display = ""
-    if getattr(post, 'author', None):
-        info = getattr(post.author, 'info', {})
+    if author_infos is not None:
+        username = _author_pk(post)
+        info = author_infos.get(username) or {}
+        author_display = (info.get('displayedName') or '').strip() or username
+    elif post.author:
+        # legacy path: dereferences the author document
+        info = post.author.info
         if isinstance(info, dict):
             author_display = info.get('displayedName', '').strip()
         if not author_display:
-            author_display = getattr(post.author, 'username', '')
-    problem_id = ''
-    try:
-        raw = post.to_mongo().to_dict()
-        problem_id = raw.get('problemId', post.problem_id)
-    except Exception:
-        problem_id = getattr(post, 'problem_id', '')
-    if problem_id is None: problem_id = ''
+            author_display = post.author.username
+    # document fields are always defined; plain access beats getattr
+    # with a default, and to_mongo() walked the whole document
+    problem_id = post.problem_id or ''
     return {
         'Post_Id': post.post_id,
         'Author': author_display,
@@ -46,6 +87,7 @@ def format_discussion_post(post):
         'Is_Pinned': bool(post.is_pinned),
         'Is_Solved': bool(post.is_solved),
         'Is_Closed': bool(post.is_closed),
+        'Is_Liked': bool(liked_ids and post.post_id in liked_ids),
         'Problem_Id': problem_id,
     }
 
@@ -56,8 +98,8 @@ def format_discussion_post(post):
 def list_discussion_posts(user, Limit, Page, Problem_Id, Mode, Course_Id):
     # 手動處理型別與預設值，避免裝飾器拋出 400
     try:
-        limit = max(1, min(int(Limit or 20), 50))
-        page = max(1, min(int(Page or 1), 1000))
+        limit = _clamp_int(Limit, 20, 1, 50)
+        page = _clamp_int(Page, 1, 1, 1000)
     except (ValueError, TypeError):
         return _err('Limit and Page must be integers.', 400)
 
@@ -72,14 +114,24 @@ def list_discussion_posts(user, Limit, Page, Problem_Id, Mode, Course_Id):
         return _err('Invalid parameter.', 400)
 
     raw_posts = data.get('Posts', [])
-    data['Posts'] = [format_discussion_post(post) for post in raw_posts]
-
+    # one batched query resolves every author info on the page
+    author_infos = User.get_infos(
+        {name for post in raw_posts if (name := _author_pk(post))})
+    liked_ids = data.get('Liked_Ids') or set()
+    data['Posts'] = [
+        format_discussion_post(post, author_infos, liked_ids)
+        for post in raw_posts
+    ]
+
+    # build the response once instead of filtering into an intermediate
+    # dict and unpacking it again
     resp_data = {
         'Status': 'OK',
         'Mode': mode,
         'Limit': limit,
         'Page': page,
-        **_filter_response_data(data, {'Total', 'Posts'})
+        'Total': data.get('Total', 0),
+        'Posts': data['Posts'],
     }
     if Problem_Id:
         resp_data.update({
@@ -95,8 +147,8 @@ def list_discussion_posts(user, Limit, Page, Problem_Id, Mode, Course_Id):
 @Request.args('Limit', 'Page', 'Mode', 'Course_Id')
 def list_discussion_problems(user, Limit, Page, Mode, Course_Id):
     try:
-        limit = max(1, min(int(Limit or 20), 50))
-        page = max(1, min(int(Page or 1), 1000))
+        limit = _clamp_int(Limit, 20, 1, 50)
+        page = _clamp_int(Page, 1, 1, 1000)
     except (ValueError, TypeError):
         return _err('Limit and Page must be integers.', 400)
 
@@ -105,15 +157,15 @@ def list_discussion_problems(user, Limit, Page, Mode, Course_Id):
         return _err('Invalid Mode. Available values: All.', 400)
 
     data = Discussion.get_problems(user, 'All', limit, page, Course_Id)
-    return HTTPResponse(
-        'Success.',
-        data={
-            'Status': 'OK',
-            'Mode': 'All',
-            'Limit': limit,
-            'Page': page,
-            **_filter_response_data(data, {'Total', 'Problems'})
-        })
+    return HTTPResponse('Success.',
+                        data={
+                            'Status': 'OK',
+                            'Mode': 'All',
+                            'Limit': limit,
+                            'Page': page,
+                            'Total': data.get('Total', 0),
+                            'Problems': data.get('Problems', []),
+                        })
 
 
 @discussion_api.route('/search', methods=['GET'])
@@ -126,8 +178,8 @@ def search_discussion_posts(user, Words, Limit, Page, Course_Id):
         return HTTPResponse('Success.', data={'Status': 'OK', 'Post': []})
 
     try:
-        limit = max(1, min(int(Limit or 20), 50))
-        page = max(1, min(int(Page or 1), 1000))
+        limit = _clamp_int(Limit, 20, 1, 50)
+        page = _clamp_int(Page, 1, 1, 1000)
     except (ValueError, TypeError):
         return _err('Limit and Page must be integers.', 400)
 
@@ -150,9 +202,7 @@ def create_discussion_post(user, Title, Content, Problem_id, Category,
                                        str(Problem_id).strip(), Category or "",
                                        Language or "", bool(Contains_Code))
     if err:
-        code = 403 if 'permission' in err.lower() or 'allowed' in err.lower(
-        ) else 400
-        return _err(err, code)
+        return _err(err, _CREATE_ERR_STATUS.get(err, 400))
     return HTTPResponse('Success.',
                         data={
                             'Status': 'OK',
@@ -171,8 +221,7 @@ def create_discussion_reply(user, post_id, Content, Reply_To, Contains_Code):
         user, post_id, content, Reply_To if Reply_To is not None else post_id,
         bool(Contains_Code))
     if err:
-        code = 404 if 'not found' in err.lower() else 403
-        return _err(err, code)
+        return _err(err, _REPLY_ERR_STATUS.get(err, 403))
     return HTTPResponse('Success.',
                         data={
                             'Status': 'OK',
@@ -187,8 +236,7 @@ def like_discussion_target(user, post_id, ID, Action):
     if ID is None or Action is None: return _err('Invalid ID or Action.', 400)
     data, err = Discussion.toggle_like(user, post_id, int(ID), bool(Action))
     if err:
-        code = 404 if 'not found' in err.lower() else 403
-        return _err(err, code)
+        return _err(err, _LIKE_ERR_STATUS.get(err, 403))
     return HTTPResponse(
         'Success.',
         data={
@@ -204,8 +252,7 @@ def update_discussion_post_status(user, post_id, Action):
     data, err = Discussion.update_status(user, post_id,
                                          str(Action or '').lower())
     if err:
-        code = 400 if 'unsupported' in err.lower() else 403
-        return _err(err, code)
+        return _err(err, _STATUS_ERR_STATUS.get(err, 403))
     return HTTPResponse('Success.',
                         data={
                             'Status': 'OK',
@@ -221,9 +268,7 @@ def delete_discussion_entity(user, post_id, Type, Id):
     data, err = Discussion.delete_entity(user, post_id,
                                          str(Type or '').lower(), int(Id))
     if err:
-        code = 404 if 'not found' in err.lower() else (
-            400 if 'type' in err.lower() else 403)
-        return _err(err, code)
+        return _err(err, _DELETE_ERR_STATUS.get(err, 403))
     return HTTPResponse('Success.',
                         data={
                             'Status': 'OK',
@@ -246,9 +291,33 @@ def get_discussion_problem_meta(user, problem_id):
 
 @discussion_api.route('/posts/<int:post_id>', methods=['GET'])
 @login_required
-def get_discussion_post_detail(user, post_id):
-    data, err = Discussion.get_post_detail(user, post_id)
+@Request.args('Reply_Limit', 'Reply_Offset')
+def get_discussion_post_detail(user, post_id, Reply_Limit, Reply_Offset):
+    try:
+        reply_limit = _clamp_int(Reply_Limit, 20, 1, 100)
+        reply_offset = _clamp_int(Reply_Offset, 0, 0, 1000000)
+    except (ValueError, TypeError):
+        return _err('Reply_Limit and Reply_Offset must be integers.', 400)
+
+    data, err = Discussion.get_post_detail(user, post_id, reply_limit,
+                                           reply_offset)
     if err:
         code = 403 if 'permission' in err.lower() else 404
         return _err(err, code)
     return HTTPResponse('Success.', data={'Status': 'OK', 'Post': [data]})
+
+
+@discussion_api.route('/posts/<int:post_id>/replies', methods=['GET'])
+@login_required
+@Request.args('Limit', 'Offset')
+def list_discussion_replies(user, post_id, Limit, Offset):
+    try:
+        limit = _clamp_int(Limit, 20, 1, 100)
+        offset = _clamp_int(Offset, 0, 0, 1000000)
+    except (ValueError, TypeError):
+        return _err('Limit and Offset must be integers.', 400)
+
+    data, err = Discussion.get_replies(user, post_id, limit, offset)
+    if err:
+        return _err(err, _REPLY_ERR_STATUS.get(err, 403))
+    return HTTPResponse('Success.', data={'Status': 'OK', **data})
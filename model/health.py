@@ -29,3 +29,10 @@ def health():
                 'redis': redis_ok
             },
         )
+
+
+@health_api.route('/ai')
+def ai_backpressure():
+    # Per-model AIMD concurrency counters for upstream AI calls
+    from model.ai.backpressure import snapshot_all
+    return HTTPResponse(data=snapshot_all())
@@ -27,6 +27,35 @@ class _Request(type):
     def __getattr__(self, content_type):
 
         def get(*keys, vars_dict={}):
+            # Parse parameter specifications once at decoration time so the
+            # per-request path only walks precomputed (name, type, keys)
+            # tuples instead of re-deriving them on every call.
+            specs = []
+            for key_spec in keys:
+                if ':' in key_spec:
+                    param_name, type_str = key_spec.split(':', 1)
+                    param_name = param_name.strip()
+                    target_type = type_map.get(type_str.strip())
+                else:
+                    param_name = key_spec.strip()
+                    target_type = None
+
+                # Smart key lookup (Snake/Camel/Title)
+                # Determine key name candidates
+                parts = [p for p in param_name.split('_') if p]
+                if not parts:
+                    camel_key = param_name
+                else:
+                    camel_key = parts[0] + ''.join(p.capitalize()
+                                                   for p in parts[1:])
+
+                possible_keys = (
+                    camel_key,  # languageType
+                    param_name,  # language_type
+                    param_name.title(),  # Language_Type
+                    param_name.upper()  # LANGUAGE_TYPE
+                )
+                specs.append((param_name, target_type, possible_keys))
 
             def data_func(func):
 
@@ -46,32 +75,8 @@ class _Request(type):
 
                     parsed_kwargs = {}
 
-                    for key_spec in keys:
-                        # 2. Parsing parameter specifications
-                        if ':' in key_spec:
-                            param_name, type_str = key_spec.split(':', 1)
-                            param_name = param_name.strip()
-                            target_type = type_map.get(type_str.strip())
-                        else:
-                            param_name = key_spec.strip()
-                            target_type = None
-
-                        # 3. Smart key lookup (Snake/Camel/Title)
-                        #    Determine key name candidates
-                        parts = [p for p in param_name.split('_') if p]
-                        if not parts:
-                            camel_key = param_name
-                        else:
-                            camel_key = parts[0] + ''.join(p.capitalize()
-                                                           for p in parts[1:])
-
-                        possible_keys = [
-                            camel_key,  # languageType
-                            param_name,  # language_type
-                            param_name.title(),  # Language_Type
-                            param_name.upper()  # LANGUAGE_TYPE
-                        ]
-
+                    for param_name, target_type, possible_keys in specs:
+                        # 2. Look up the first matching key candidate
                         value = None
                         found_key = None
 
@@ -81,7 +86,7 @@ class _Request(type):
                                 found_key = k
                                 break
 
-                        # 4. Checking for missing values
+                        # 3. Checking for missing values
                         #    Required fields missing should directly report error
                         if value is None and target_type is not None:
                             if param_name not in vars_dict:
@@ -93,7 +98,7 @@ class _Request(type):
                                 return HTTPError(
                                     'Requested Value With Wrong Type', 400)
 
-                        # 5. Type conversion and validation
+                        # 4. Type conversion and validation
                         if target_type is not None and value is not None:
                             if not isinstance(value, target_type):
                                 try:
@@ -131,7 +136,7 @@ class _Request(type):
 
                         parsed_kwargs[param_name] = value
 
-                    # 6. Processing vars_dict
+                    # 5. Processing vars_dict
                     for v in vars_dict:
                         parsed_kwargs[v] = request_data.get(vars_dict[v])
 
@@ -1,6 +1,45 @@
 from flask import jsonify, redirect, current_app
+from flask.json.provider import DefaultJSONProvider
 
-__all__ = ['HTTPResponse', 'HTTPRedirect', 'HTTPError']
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+__all__ = ['HTTPResponse', 'HTTPRedirect', 'HTTPError', 'setup_json']
+
+
+class ORJSONProvider(DefaultJSONProvider):
+    '''
+    orjson-backed JSON provider: serialization happens in C, which
+    matters on large payloads like scoreboards and member lists.
+    Datetimes are passed through to Flask's default handler so the wire
+    format stays identical to the stock provider.
+    '''
+
+    def dumps(self, obj, **kwargs):
+        try:
+            return orjson.dumps(
+                obj,
+                default=self.default,
+                option=orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_SORT_KEYS,
+            ).decode()
+        except TypeError:
+            # orjson rejects integers outside 64 bits; let the stdlib
+            # encoder handle such payloads
+            return super().dumps(obj, **kwargs)
+
+    # parsing stays on the stdlib: orjson.loads silently degrades
+    # integers beyond 64 bits to floats
+
+
+def setup_json(app):
+    '''
+    Switch the app to orjson when it is installed; otherwise keep
+    Flask's default provider.
+    '''
+    if orjson is not None:
+        app.json = ORJSONProvider(app)
 
 
 class HTTPBaseResponese(tuple):
@@ -47,12 +86,18 @@ class HTTPResponse(HTTPBaseResponese):
         status='ok',
         data=None,
         cookies={},
+        etag=None,
     ):
         resp = jsonify({
             'status': status,
             'message': message,
             'data': data,
         })
+        if etag is not None:
+            # Enable conditional GET for pollable endpoints
+            resp.set_etag(etag)
+            resp.cache_control.private = True
+            resp.cache_control.max_age = 5
         return super().__new__(
             HTTPBaseResponese,
             resp,
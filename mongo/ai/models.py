@@ -7,9 +7,13 @@ This module contains all MongoDB document wrappers for AI-related features:
 - AiApiLog: Conversation history
 - AiTokenUsage: Token usage tracking
 """
+import json
+import threading
+import time
 from datetime import datetime
 from mongo import engine
 from mongo.base import MongoBase
+from mongo.utils import RedisCache
 
 __all__ = [
     'AiModel',
@@ -18,6 +22,25 @@ __all__ = [
     'AiTokenUsage',
 ]
 
+# RPM limits change rarely, so cache them briefly: the key suggestion
+# endpoint reads one on every teacher page load.
+RPM_LIMIT_TTL = 300.0
+_RPM_LIMIT_CACHE_MAX = 64
+_rpm_limit_cache = {}
+_rpm_limit_lock = threading.Lock()
+
+# key listing pages poll; serve a short-lived cached copy
+AI_KEY_LIST_TTL = 30
+AI_KEY_USAGE_TTL = 30
+
+
+def _key_list_cache_key(course_name: str) -> str:
+    return f'AI_KEY_LIST_{course_name}'
+
+
+def _key_usage_cache_key(course_name: str) -> str:
+    return f'AI_KEY_USAGE_{course_name}'
+
 
 class AiModel(MongoBase, engine=engine.AiModel):
     """
@@ -91,14 +114,28 @@ class AiModel(MongoBase, engine=engine.AiModel):
             except Exception as e:
                 print(f"Failed to init model {config['name']}: {e}")
 
+        # limits may have just changed
+        with _rpm_limit_lock:
+            _rpm_limit_cache.clear()
+
     @classmethod
     def get_rpm_limit(cls, name: str, default: int = 5):
-        """Get RPM limit for a specific model"""
+        """Get RPM limit for a specific model (cached for a few minutes)"""
+        now = time.monotonic()
+        with _rpm_limit_lock:
+            hit = _rpm_limit_cache.get(name)
+            if hit is not None and now - hit[1] < RPM_LIMIT_TTL:
+                return hit[0]
         try:
             model = cls.get_by_name(name)
-            return model.rpm_limit
+            limit = model.rpm_limit
         except Exception:
             return default
+        with _rpm_limit_lock:
+            if len(_rpm_limit_cache) >= _RPM_LIMIT_CACHE_MAX:
+                _rpm_limit_cache.clear()
+            _rpm_limit_cache[name] = (limit, now)
+        return limit
 
 
 class AiApiKey(MongoBase, engine=engine.AiApiKey):
@@ -302,6 +339,12 @@ class AiApiKey(MongoBase, engine=engine.AiApiKey):
     @classmethod
     def get_keys_usage_by_course(cls, course_name: str):
         """Get usage statistics for all API keys in a course."""
+        # the usage dashboard polls; serve a short-lived cached copy
+        cache = RedisCache()
+        cache_key = _key_usage_cache_key(course_name)
+        if (val := cache.get(cache_key)) is not None:
+            return json.loads(val)
+
         course_obj = engine.Course.objects(course_name=course_name).first()
         if not course_obj:
             return []
@@ -345,16 +388,33 @@ class AiApiKey(MongoBase, engine=engine.AiApiKey):
             if kid in key_map:
                 key_map[kid]['problem_usages'].extend(zero_usages)
 
-        return list(key_map.values())
+        result = list(key_map.values())
+        cache.set(cache_key, json.dumps(result), ex=AI_KEY_USAGE_TTL)
+        return result
 
     @classmethod
     def get_list_by_course(cls, course_name: str):
         """Get all API Keys for a specific course by course_name (string)"""
-        course_obj = engine.Course.objects(course_name=course_name).first()
+        cache = RedisCache()
+        cache_key = _key_list_cache_key(course_name)
+        if (val := cache.get(cache_key)) is not None:
+            return json.loads(val)
+
+        course_obj = engine.Course.objects(
+            course_name=course_name).only('id').first()
         if not course_obj:
             return []
 
-        keys = cls.engine.objects(course_name=course_obj)
+        keys = cls.engine.objects(course_name=course_obj).only(
+            'id',
+            'key_name',
+            'key_value',
+            'is_active',
+            'input_token',
+            'output_token',
+            'request_count',
+            'created_by',
+        )
         result_list = []
 
         for key in keys:
@@ -381,8 +441,16 @@ class AiApiKey(MongoBase, engine=engine.AiApiKey):
                 key.created_by.username if key.created_by else "System"
             })
 
+        cache.set(cache_key, json.dumps(result_list), ex=AI_KEY_LIST_TTL)
         return result_list
 
+    @classmethod
+    def invalidate_list_cache(cls, course_name: str):
+        """Drop the cached key list and usage stats after a key write"""
+        cache = RedisCache()
+        cache.delete(_key_list_cache_key(course_name))
+        cache.delete(_key_usage_cache_key(course_name))
+
     @classmethod
     def add_key(cls,
                 course_id,
@@ -430,6 +498,23 @@ class AiApiKey(MongoBase, engine=engine.AiApiKey):
     def get_key_by_id(cls, key_id):
         return cls.engine.objects(id=key_id).first()
 
+    @classmethod
+    def get_key_scoped(cls, key_id, course_doc):
+        """
+        Fetch a key scoped to a course in one projected query.
+
+        Returns (key, belongs): key is None when no such key exists at
+        all; belongs tells whether it is attached to the given course.
+        Only the id is projected since callers just authorize and then
+        operate by key_id.
+        """
+        key = cls.engine.objects(id=key_id,
+                                 course_name=course_doc).only('id').first()
+        if key is not None:
+            return key, True
+        key = cls.engine.objects(id=key_id).only('id').first()
+        return key, False
+
 
 class AiApiLog(MongoBase, engine=engine.AiApiLog):
     """
@@ -1,7 +1,33 @@
+import hashlib
+import json
 import os
+from dataclasses import dataclass
 from typing import Dict, Optional, Tuple
 
+from flask import g, has_request_context
+
 from mongo import Course, Problem, Submission, User
+from mongo.utils import RedisCache
+
+# how long collected submission paths stay valid; repeated MOSS runs for
+# the same problem within this window skip the per-submission lookups
+MOSS_PATHS_TTL = 60
+
+
+def _request_cache() -> Dict:
+    """
+    Per-request memo dict stored on `flask.g`.
+
+    Outside a request context (e.g. the MOSS background thread) a throwaway
+    dict is returned, so callers simply get no caching there.
+    """
+    if not has_request_context():
+        return {}
+    cache = getattr(g, '_copycat_cache', None)
+    if cache is None:
+        cache = {}
+        g._copycat_cache = cache
+    return cache
 
 
 def get_moss_userid() -> Optional[int]:
@@ -48,18 +74,85 @@ def collect_submission_paths(user, problem_id,
     return last_cc_submission, last_python_submission
 
 
+def _paths_cache_key(user, problem_id, student_dict: Dict) -> str:
+    students = hashlib.blake2b(
+        json.dumps(sorted(student_dict.items())).encode(),
+        digest_size=8,
+    ).hexdigest()
+    return f'MOSS_PATHS_{user.username}_{problem_id}_{students}'
+
+
+def collect_submission_paths_cached(user, problem_id,
+                                    student_dict: Dict) -> Tuple[Dict, Dict]:
+    '''
+    Cached front of collect_submission_paths keyed by requester, problem
+    and student set.
+    '''
+    cache = RedisCache()
+    key = _paths_cache_key(user, problem_id, student_dict)
+    if (val := cache.get(key)) is not None:
+        cc_paths, python_paths = json.loads(val)
+        return cc_paths, python_paths
+    cc_paths, python_paths = collect_submission_paths(
+        user,
+        problem_id,
+        student_dict,
+    )
+    cache.set(key, json.dumps([cc_paths, python_paths]), ex=MOSS_PATHS_TTL)
+    return cc_paths, python_paths
+
+
 def get_problem(problem_id):
-    return Problem(problem_id)
+    cache = _request_cache()
+    key = ('problem', str(problem_id))
+    if key not in cache:
+        cache[key] = Problem(problem_id)
+    return cache[key]
 
 
 def get_course(course_id):
-    return Course(course_id)
+    cache = _request_cache()
+    key = ('course', str(course_id))
+    if key not in cache:
+        cache[key] = Course(course_id)
+    return cache[key]
+
+
+@dataclass
+class ProblemReportState:
+    cpp_report_url: str
+    python_report_url: str
+    moss_status: int
+
+
+def get_problem_report_state(problem_id) -> Optional[ProblemReportState]:
+    """
+    Fetch only the report fields of a problem in one projected query.
+
+    Returns None if the problem does not exist.
+    """
+    doc = Problem.engine.objects(pk=problem_id).only(
+        'cpp_report_url',
+        'python_report_url',
+        'moss_status',
+    ).first()
+    if doc is None:
+        return None
+    return ProblemReportState(
+        cpp_report_url=doc.cpp_report_url,
+        python_report_url=doc.python_report_url,
+        moss_status=doc.moss_status,
+    )
 
 
 def has_grade_permission(course, user) -> bool:
     if not course:
         return False
-    return course.permission(user, Course.Permission.GRADE)
+    cache = _request_cache()
+    key = ('grade_permission', str(course.pk), user.username)
+    if key not in cache:
+        cache[key] = course.permission(user, Course.Permission.GRADE)
+    return cache[key]
 
 
 def build_student_dict(
@@ -1,20 +1,37 @@
+from flask import g, has_request_context
+
 from . import engine
 from .user import *
 from .user import Role
 from .utils import *
+import json
 import re
 import enum
 import secrets
 import string
+from functools import cached_property
 from typing import Dict, List, Optional, Any
 from .base import MongoBase
 from datetime import datetime
 
 __all__ = [
     'Course',
+    'migrate_student_scores',
 ]
 
 
+# course/auth codes are 8 uppercase alphanumerics; compiled once so
+# malformed codes are rejected without a DB round-trip
+_CODE_RE = re.compile(r'^[A-Z0-9]{8}$')
+
+
+def _ref_pk(ref):
+    '''
+    Primary key of a possibly non-dereferenced reference field value.
+    '''
+    return getattr(ref, 'pk', getattr(ref, 'id', ref))
+
+
 class Course(MongoBase, engine=engine.Course):
 
     class Permission(enum.IntFlag):
@@ -24,12 +41,42 @@ class Course(MongoBase, engine=engine.Course):
         GRADE = enum.auto()  # grade students' score
 
     def check_privilege(self, user):
+        # memoize per request: handlers tend to ask several times for the
+        # same (course, user) pair and each check dereferences the TA list
+        if not has_request_context():
+            return self._check_privilege(user)
+        cache = getattr(g, '_course_priv_cache', None)
+        if cache is None:
+            cache = {}
+            g._course_priv_cache = cache
+        key = (str(self.pk), user.pk)
+        if key not in cache:
+            cache[key] = self._check_privilege(user)
+        return cache[key]
+
+    def _check_privilege(self, user):
         return any((
             user.role == Role.ADMIN,
             bool(self.obj.teacher and user.pk == self.obj.teacher.pk),
-            user.pk in [ta.pk for ta in self.obj.tas],
+            user.pk in self.ta_pk_set,
         ))
 
+    @cached_property
+    def student_set(self) -> frozenset:
+        '''
+        usernames of enrolled students, cached on the wrapper so repeated
+        membership checks don't rebuild the key view
+        '''
+        return frozenset(self.student_nicknames)
+
+    @cached_property
+    def ta_pk_set(self) -> set:
+        '''
+        primary keys of the TA list, read from the raw document data so
+        membership checks don't dereference every TA
+        '''
+        return {_ref_pk(t) for t in (self.obj._data.get('tas') or [])}
+
     def __new__(cls, course_name, *args, **kwargs):
         try:
             new = super().__new__(cls, course_name)
@@ -55,6 +102,8 @@ class Course(MongoBase, engine=engine.Course):
         for user in new_user:
             self.add_user(User(user).obj)
         self.student_nicknames = student_nicknames
+        self.__dict__.pop('student_set', None)
+        self.__dict__.pop('member_username_set', None)
         # TODO: use event to update homework data
         drop_user = [*map(User, drop_user)]
         new_user = [*map(User, new_user)]
@@ -73,18 +122,24 @@ class Course(MongoBase, engine=engine.Course):
         user.update(pull__courses=self.id)
         user.reload('courses')
 
+    @cached_property
+    def member_username_set(self) -> frozenset:
+        '''
+        usernames of every member (teacher, TAs, students), built from
+        the raw reference values and cached on the wrapper
+        '''
+        teacher = self.obj._data.get('teacher')
+        usernames = set(self.ta_pk_set)
+        if teacher is not None:
+            usernames.add(_ref_pk(teacher))
+        usernames.update(self.student_nicknames or {})
+        return frozenset(usernames)
+
     def get_member_usernames(self) -> set:
         '''
         Get all member usernames (teacher, TAs, students)
         '''
-        member_usernames = set()
-        if self.teacher:
-            member_usernames.add(self.teacher.username)
-        for ta in (self.tas or []):
-            member_usernames.add(ta.username)
-        for username in (self.student_nicknames or {}).keys():
-            member_usernames.add(username)
-        return member_usernames
+        return set(self.member_username_set)
 
     @classmethod
     def get_all(cls):
@@ -97,6 +152,140 @@ class Course(MongoBase, engine=engine.Course):
         else:
             return cls.get_all()
 
+    @classmethod
+    def lightweight(cls, course_name: str, *fields: str) -> 'Course':
+        '''
+        Wrapper over a projected course document for routes that only
+        read a few fields. The permission-relevant fields are always
+        included; the student score map is what stays undecoded.
+        '''
+        doc = engine.Course.objects(course_name=course_name).only(
+            'course_name',
+            'teacher',
+            'tas',
+            'student_nicknames',
+            *fields,
+        ).first()
+        return cls(doc) if doc is not None else cls(course_name)
+
+    @classmethod
+    def list_cards(cls, user) -> List[Dict[str, Any]]:
+        '''
+        Lightweight course cards for the listing endpoint: a projected
+        query plus one batched lookup for the teacher infos, instead of
+        loading full course documents and dereferencing each teacher.
+        '''
+        if user.role == Role.ADMIN:
+            qs = cls.get_all()
+        else:
+            course_ids = [
+                _ref_pk(c) for c in (user.obj._data.get('courses') or [])
+            ]
+            qs = engine.Course.objects(pk__in=course_ids)
+        courses = list(qs.only('course_name', 'teacher', 'color', 'emoji'))
+        teacher_infos = User.get_infos(
+            _ref_pk(t) for c in courses
+            if (t := c._data.get('teacher')) is not None)
+        cards = []
+        for course in courses:
+            teacher = course._data.get('teacher')
+            cards.append({
+                'course':
+                course.course_name,
+                'teacher':
+                teacher_infos.get(_ref_pk(teacher))
+                if teacher is not None else None,
+                'color':
+                course.color,
+                'emoji':
+                course.emoji,
+            })
+        return cards
+
+    @classmethod
+    def get_all_summaries(cls, user) -> List[Dict]:
+        '''
+        Summaries of every course in a constant number of queries.
+
+        One grouped aggregation per collection replaces the three count
+        queries get_course_summary issues per course.
+        '''
+        from .problem import Problem
+        courses = [cls(c) for c in cls.get_all().only('course_name')]
+        problems_by_course = Problem.get_problem_lists_by_courses(
+            user, [c.course_name for c in courses])
+
+        user_counts = {
+            item['_id']: item['count']
+            for item in engine.User.objects.aggregate([
+                {
+                    '$unwind': '$courses'
+                },
+                {
+                    '$group': {
+                        '_id': '$courses',
+                        'count': {
+                            '$sum': 1
+                        }
+                    }
+                },
+            ])
+        }
+        homework_counts = {
+            item['_id']: item['count']
+            for item in engine.Homework.objects.aggregate([
+                {
+                    '$group': {
+                        '_id': '$courseId',
+                        'count': {
+                            '$sum': 1
+                        }
+                    }
+                },
+            ])
+        }
+        # submissions reference problems, so count per problem and fold
+        # the counts into the courses each problem belongs to
+        pid2names = {}
+        for name, problems in problems_by_course.items():
+            for p in problems:
+                pid2names.setdefault(p.problem_id, []).append(name)
+        submission_counts = {}
+        if pid2names:
+            for item in engine.Submission.objects.aggregate([
+                {
+                    '$match': {
+                        'problem': {
+                            '$in': [*pid2names]
+                        }
+                    }
+                },
+                {
+                    '$group': {
+                        '_id': '$problem',
+                        'count': {
+                            '$sum': 1
+                        }
+                    }
+                },
+            ]):
+                for name in pid2names[item['_id']]:
+                    submission_counts[name] = (submission_counts.get(name, 0) +
+                                               item['count'])
+
+        return [{
+            'course':
+            course.course_name,
+            'userCount':
+            user_counts.get(course.id, 0),
+            'homeworkCount':
+            homework_counts.get(str(course.id), 0),
+            'submissionCount':
+            submission_counts.get(course.course_name, 0),
+            'problemCount':
+            len(problems_by_course.get(course.course_name, [])),
+        } for course in courses]
+
     def get_course_summary(self, problems: list):
         return {
             "course":
@@ -161,14 +350,42 @@ class Course(MongoBase, engine=engine.Course):
         self.delete()
         return True
 
+    SCOREBOARD_CACHE_TTL = 10
+
+    def scoreboard_cache_key(
+        self,
+        problem_ids: List[int],
+        start: Optional[float],
+        end: Optional[float],
+    ) -> str:
+        pids = '-'.join(str(getattr(p, 'pk', p)) for p in problem_ids)
+        return f'SCOREBOARD_{self.pk}_{pids}_{start}_{end}'
+
     def get_scoreboard(
         self,
         problem_ids: List[int],
         start: Optional[float] = None,
         end: Optional[float] = None,
+    ) -> List[Dict]:
+        # a live scoreboard is polled by the whole class; serve a briefly
+        # cached copy instead of re-running the aggregation per viewer
+        cache = RedisCache()
+        key = self.scoreboard_cache_key(problem_ids, start, end)
+        if (val := cache.get(key)) is not None:
+            return json.loads(val)
+        scoreboard = self._build_scoreboard(problem_ids, start, end)
+        cache.set(key, json.dumps(scoreboard), ex=self.SCOREBOARD_CACHE_TTL)
+        return scoreboard
+
+    def _build_scoreboard(
+        self,
+        problem_ids: List[int],
+        start: Optional[float] = None,
+        end: Optional[float] = None,
     ) -> List[Dict]:
         scoreboard = []
-        usernames = [User(u).id for u in self.student_nicknames.keys()]
+        # username is the user pk, no per-student lookup needed
+        usernames = list(self.student_nicknames)
         matching = {
             "user": {
                 "$in": usernames
@@ -224,11 +441,12 @@ class Course(MongoBase, engine=engine.Course):
             },
         ]
         cursor = engine.Submission.objects().aggregate(pipeline)
+        infos = User.get_infos(usernames)
         unrecorded_users = set(usernames)
         for item in cursor:
             sum_of_score = sum(s['max'] for s in item['scores'])
             scoreboard.append({
-                'user': User(item['_id']).info,
+                'user': infos.get(item['_id']),
                 'sum': sum_of_score,
                 'avg': sum_of_score / len(problem_ids),
                 **{
@@ -239,13 +457,58 @@ class Course(MongoBase, engine=engine.Course):
             unrecorded_users.remove(item['_id'])
         for u in unrecorded_users:
             scoreboard.append({
-                'user': User(u).info,
+                'user': infos.get(u),
                 'sum': 0,
                 'avg': 0,
             })
 
         return scoreboard
 
+    def push_score(self, student: str, title: str, entry: Dict) -> bool:
+        '''
+        Atomically add a score entry under its title.
+
+        The duplicate-title guard lives in the update filter, so two
+        concurrent teachers cannot both add the same title. Returns False
+        when the title is already taken.
+        '''
+        field = f'studentScores.{student}.{title}'
+        matched = self.engine.objects(
+            pk=self.pk,
+            __raw__={
+                field: {
+                    '$exists': False
+                }
+            },
+        ).update_one(__raw__={'$set': {
+            field: entry
+        }})
+        return matched > 0
+
+    def update_score(self,
+                     student: str,
+                     title: str,
+                     entry: Dict,
+                     old_title: str = None):
+        '''
+        Overwrite one score entry with a targeted $set, dropping the old
+        key in the same update when the entry was renamed.
+        '''
+        base = f'studentScores.{student}'
+        ops = {'$set': {f'{base}.{title}': entry}}
+        if old_title is not None and old_title != title:
+            ops['$unset'] = {f'{base}.{old_title}': 1}
+        self.obj.update(__raw__=ops)
+
+    def pull_score(self, student: str, title: str):
+        '''
+        Remove the score entry with the given title.
+        '''
+        self.obj.update(
+            __raw__={'$unset': {
+                f'studentScores.{student}.{title}': 1
+            }})
+
     @staticmethod
     def generate_course_code(length: int = 8) -> str:
         """
@@ -285,16 +548,13 @@ class Course(MongoBase, engine=engine.Course):
         if not self:
             raise engine.DoesNotExist('Course')
 
-        # Use pull to remove from list
-        # We can't really pull by code easily with EmbeddedDocument unless we match exact object
-        # So filtering list and saving is easier
-        filtered = [ac for ac in self.auth_codes if ac.code != code]
-        if len(filtered) == len(self.auth_codes):
-            return False  # Not found
-
-        self.auth_codes = filtered
-        self.save()
-        return True
+        # pull the matching embedded document server-side instead of
+        # filtering the list in Python and rewriting the whole document
+        matched = self.engine.objects(
+            pk=self.pk,
+            auth_codes__code=code,
+        ).update_one(pull__auth_codes__code=code)
+        return matched > 0
 
     @classmethod
     def get_by_code(cls, code: str) -> Optional['Course']:
@@ -302,6 +562,8 @@ class Course(MongoBase, engine=engine.Course):
         Get a course by its course code.
         Returns None if not found.
         """
+        if not code or not _CODE_RE.match(code):
+            return None
         try:
             course_doc = engine.Course.objects(
                 engine.Q(course_code=code)
@@ -393,13 +655,38 @@ class Course(MongoBase, engine=engine.Course):
         cls(co).add_user(teacher.obj)
         return True
 
+    PUBLIC_COURSE_CACHE_KEY = 'PUBLIC_COURSE_ENSURED'
+    PUBLIC_COURSE_CACHE_TTL = 60
+
     @classmethod
     def get_public(cls):
-        if not cls('Public'):
-            cls.add_course('Public', 'first_admin')
+        # the existence check is a round trip on every announcement
+        # request for a course that practically never disappears; skip
+        # it while the cached flag is fresh
+        cache = RedisCache()
+        if not cache.exists(cls.PUBLIC_COURSE_CACHE_KEY):
+            if not cls('Public'):
+                cls.add_course('Public', 'first_admin')
+            cache.set(cls.PUBLIC_COURSE_CACHE_KEY,
+                      1,
+                      ex=cls.PUBLIC_COURSE_CACHE_TTL)
         return cls('Public')
 
     def own_permission(self, user) -> Permission:
+        # memoized per request like check_privilege: routes commonly test
+        # two or three flags of the same (course, user) capability
+        if not has_request_context():
+            return self._own_permission(user)
+        cache = getattr(g, '_course_perm_cache', None)
+        if cache is None:
+            cache = {}
+            g._course_perm_cache = cache
+        key = (str(self.pk), user.pk)
+        if key not in cache:
+            cache[key] = self._own_permission(user)
+        return cache[key]
+
+    def _own_permission(self, user) -> Permission:
         ROLE_CAPABILITY = {
             0:
             self.Permission(0),
@@ -438,3 +725,55 @@ class Course(MongoBase, engine=engine.Course):
             "is_ai_enabled": self.obj.is_ai_vt_enabled,
             "ai_model": model_name
         }
+
+
+def _sanitize_score_title(title) -> str:
+    '''
+    Make a legacy score title addressable as a Mongo field key: the
+    targeted score updates write through `studentScores.<student>.<title>`
+    path expressions, which cannot express dots or a leading dollar sign.
+    '''
+    safe = str(title).replace('.', '_').lstrip('$')
+    return safe or '_'
+
+
+def _sanitized_score_dict(entries) -> Dict:
+    '''
+    Re-key a {title: entry} dict with sanitized titles, suffixing on
+    collision so distinct legacy titles stay distinct.
+    '''
+    result = {}
+    for title, entry in entries.items():
+        safe = _sanitize_score_title(title)
+        while safe in result:
+            safe += '_'
+        result[safe] = entry
+    return result
+
+
+def migrate_student_scores():
+    '''
+    One-off migration: studentScores used to hold a list of
+    {title, content, score, timestamp} per student; convert each list to
+    a dict keyed by title so lookups and updates are O(1). Titles are
+    sanitized on the way in — keys containing `.` or starting with `$`
+    cannot be addressed by the targeted update paths.
+    '''
+    for course in engine.Course.objects(student_scores__ne={}):
+        migrated = {}
+        changed = False
+        for student, scores in course.student_scores.items():
+            if isinstance(scores, list):
+                migrated[student] = _sanitized_score_dict({
+                    s['title']: {k: v
+                                 for k, v in s.items() if k != 'title'}
+                    for s in scores
+                })
+                changed = True
+            else:
+                fixed = _sanitized_score_dict(scores)
+                if list(fixed) != list(scores):
+                    changed = True
+                migrated[student] = fixed
+        if changed:
+            course.update(student_scores=migrated)
@@ -1,18 +1,82 @@
+import functools
+import heapq
+import operator
 import re
+from collections import namedtuple
 from datetime import datetime
 from typing import Dict, Optional, Tuple
 
+from flask import g, has_request_context
+from pymongo.errors import OperationFailure
+
 from mongo import engine
 
-__all__ = ['Discussion']
+__all__ = ['Discussion', 'migrate_hot_scores']
 
 # 常數定義
-_STAFF_ROLES = {
+_STAFF_ROLES = frozenset({
     engine.User.Role.TEACHER,
     engine.User.Role.TA,
     engine.User.Role.ADMIN,
+})
+_PERMITTED_ROLES_INT = frozenset({0, 1, 3})
+
+# global role -> meta label, one lookup instead of chained comparisons
+_ROLE_LABELS = {
+    engine.User.Role.ADMIN: 'teacher',
+    engine.User.Role.TEACHER: 'teacher',
+    engine.User.Role.TA: 'ta',
+}
+
+_StatusAction = namedtuple('_StatusAction', ['field', 'value', 'new_status'])
+_STATUS_ACTIONS = {
+    'pin': _StatusAction('is_pinned', True, 'pinned'),
+    'unpin': _StatusAction('is_pinned', False, 'unpinned'),
+    'close': _StatusAction('is_closed', True, 'closed'),
+    'reopen': _StatusAction('is_closed', False, 'open'),
+    'solve': _StatusAction('is_solved', True, 'solved'),
+    'unsolve': _StatusAction('is_solved', False, 'unsolved'),
 }
-_PERMITTED_ROLES_INT = {0, 1, 3}
+
+# cleared on the first backend that cannot run $text queries
+_text_search_available = True
+
+# one C-level fetch for the reply payload fields instead of seven
+# attribute lookups per reply
+_REPLY_FIELDS = operator.attrgetter('reply_id', 'created_time', 'content',
+                                    'like_count', 'reply_to_id',
+                                    'contains_code')
+
+
+@functools.lru_cache(maxsize=1024)
+def _compiled_pattern(words: str) -> re.Pattern:
+    '''
+    Escaped case-insensitive search pattern, compiled once per term.
+    '''
+    return re.compile(re.escape(words), re.IGNORECASE)
+
+
+def _raw_course_ids(user) -> list:
+    '''
+    Course ids straight from the raw reference list, without
+    dereferencing each course document.
+    '''
+    doc = getattr(user, 'obj', user)
+    return [
+        getattr(c, 'pk', getattr(c, 'id', c))
+        for c in (doc._data.get('courses') or []) if c
+    ]
+
+
+def _author_username(doc) -> str:
+    '''
+    Author username from the raw reference value: the user pk is the
+    username, so no dereference query is needed.
+    '''
+    author = doc._data.get('author')
+    if author is None:
+        return ''
+    return getattr(author, 'pk', getattr(author, 'id', author)) or ''
 
 _CODE_BLOCK_MARKER_RE = re.compile(r'```|<code>|</code>', re.IGNORECASE)
 _CODE_STRONG_LINE_RE = re.compile(
@@ -23,17 +87,85 @@ _CODE_WEAK_LINE_RE = re.compile(
     r'catch|finally)\b|==|!=|<=|>=|->|=>')
 
 
+def _now() -> datetime:
+    '''
+    One wall-clock read per request: every timestamp written while
+    handling a request uses the same instant. Stays on the local-time
+    convention the rest of the schema defaults use.
+    '''
+    if not has_request_context():
+        return datetime.now()
+    now = getattr(g, '_discussion_now', None)
+    if now is None:
+        now = datetime.now()
+        g._discussion_now = now
+    return now
+
+
+def _viewer_like_ids(user, post_ids) -> set:
+    '''
+    Post ids among ``post_ids`` the viewer has liked, resolved with a
+    single $in query instead of one lookup per post.
+    '''
+    if not post_ids:
+        return set()
+    doc = getattr(user, 'obj', user)
+    return set(
+        engine.DiscussionLike.objects(
+            user=doc,
+            target_type='post',
+            target_id__in=list(post_ids),
+        ).scalar('target_id'))
+
+
+def _cached_problem(pid: int):
+    '''
+    Problem document memoized on flask.g: create, reply and meta paths
+    may all load the same problem while handling one request.
+    '''
+    if not has_request_context():
+        return engine.Problem.objects(problem_id=pid).first()
+    cache = getattr(g, '_problem_doc_cache', None)
+    if cache is None:
+        cache = {}
+        g._problem_doc_cache = cache
+    if pid not in cache:
+        cache[pid] = engine.Problem.objects(problem_id=pid).first()
+    return cache[pid]
+
+
+def _role_int(user) -> int:
+    '''
+    The user role as a plain int, tolerating enum and raw values.
+    '''
+    role_value = getattr(user.role, 'value', user.role)
+    try:
+        return int(role_value)
+    except (TypeError, ValueError):
+        return 2  # Default Student
+
+
+def _is_staff(user) -> bool:
+    '''
+    Whether the role may bypass course ACL checks, memoized per request.
+    '''
+    if not has_request_context():
+        return _role_int(user) in _PERMITTED_ROLES_INT
+    cache = getattr(g, '_staff_role_cache', None)
+    if cache is None:
+        cache = {}
+        g._staff_role_cache = cache
+    key = str(user.pk)
+    if key not in cache:
+        cache[key] = _role_int(user) in _PERMITTED_ROLES_INT
+    return cache[key]
+
+
 class Discussion:
 
     @classmethod
     def _role_can_bypass_acl(cls, user) -> bool:
-        role_value = (user.role.value
-                      if hasattr(user.role, 'value') else user.role)
-        try:
-            role_value = int(role_value)
-        except (TypeError, ValueError):
-            role_value = 2  # Default Student
-        return role_value in _PERMITTED_ROLES_INT
+        return _is_staff(user)
 
     @classmethod
     def _detect_contains_code(cls, content: str) -> bool:
@@ -71,28 +203,35 @@ class Discussion:
         if user.role == engine.User.Role.ADMIN:
             return None
 
-        course_refs = [
-            course for course in getattr(user, 'courses', []) if course
-        ]
-        if not course_refs:
+        # memoize per request: the feed, search and detail paths may all
+        # ask during one request
+        if not has_request_context():
+            return cls._query_viewable_problem_ids(user)
+        cache = getattr(g, '_viewable_pid_cache', None)
+        if cache is None:
+            cache = {}
+            g._viewable_pid_cache = cache
+        key = str(user.pk)
+        if key not in cache:
+            cache[key] = cls._query_viewable_problem_ids(user)
+        return cache[key]
+
+    @classmethod
+    def _query_viewable_problem_ids(cls, user) -> set:
+        course_ids = _raw_course_ids(user)
+        if not course_ids:
             return set()
 
         queryset = engine.Problem.objects(
             problem_status=engine.Problem.Visibility.SHOW,
-            courses__in=course_refs,
-        )
+            courses__in=course_ids,
+        ).only('problem_id')
         return {str(problem.problem_id) for problem in queryset}
 
     @classmethod
     def _can_view_problem(cls, user, problem_id: str) -> bool:
-        role_value = (user.role.value
-                      if hasattr(user.role, 'value') else user.role)
-        try:
-            role_value = int(role_value)
-        except (TypeError, ValueError):
-            role_value = 2  # Default Student
-
-        if role_value in _PERMITTED_ROLES_INT:
+        # staff skip the course ACL query entirely
+        if _is_staff(user):
             return True
 
         allowed_ids = cls._get_viewable_problem_ids(user)
@@ -148,7 +287,7 @@ class Discussion:
         queryset = engine.DiscussionPost.objects(is_deleted=False)
 
         if allowed_ids is not None and allowed_ids:
-            queryset = queryset.filter(problem_id__in=list(allowed_ids))
+            queryset = queryset.filter(problem_id__in=allowed_ids)
 
         if problem_id:
             # 權限檢查：如果指定了題目，要在允許清單內
@@ -160,35 +299,30 @@ class Discussion:
                 candidates.append(int(problem_id))
             queryset = queryset.filter(problem_id__in=candidates)
 
-        posts_list = None
         if mode == 'Hot':
-            posts_list = list(queryset)
-            posts_list.sort(key=lambda p: (
-                -int(p.is_pinned or False),
-                -(p.like_count or 0) - (p.reply_count or 0),
-                -p.created_time.timestamp(),
-                -int(p.post_id),
-            ), )
+            # Hot: Pinned DESC, hot_score DESC, Created DESC, ID DESC
+            queryset = queryset.order_by('-is_pinned', '-hot_score',
+                                         '-created_time', '-post_id')
         else:
             # New: Pinned DESC, Created DESC, ID DESC
             queryset = queryset.order_by('-is_pinned', '-created_time',
                                          '-post_id')
 
-        total = len(posts_list) if posts_list is not None else queryset.count()
-
-        start = (page - 1) * limit
-        end = start + limit
+        total = queryset.count()
 
-        if posts_list is not None:
-            window = posts_list[start:end] if start < total else []
-        else:
-            window = queryset.skip(start).limit(limit)
+        # listings never render content, the largest field
+        queryset = queryset.only('post_id', 'title', 'author', 'created_time',
+                                 'like_count', 'reply_count', 'is_pinned',
+                                 'is_solved', 'is_closed', 'problem_id')
 
-        window = list(window)
+        start = (page - 1) * limit
+        window = list(queryset.skip(start).limit(limit))
 
         return {
             'Total': total,
             'Posts': window,
+            'Liked_Ids': _viewer_like_ids(user,
+                                          [p.post_id for p in window]),
         }
 
     @classmethod
@@ -208,19 +342,17 @@ class Discussion:
             criteria['courses'] = course
 
         if user.role != engine.User.Role.ADMIN:
-            course_refs = [
-                course for course in getattr(user, 'courses', []) if course
-            ]
-            if not course_refs:
+            course_ids = _raw_course_ids(user)
+            if not course_ids:
                 return {'Total': 0, 'Problems': []}
 
             if course_id:
                 # 若指定課程，需檢查使用者是否在該課程中
                 # course 變數在上面已取得
-                if course not in course_refs:
+                if course.id not in course_ids:
                     return {'Total': 0, 'Problems': []}
             else:
-                criteria['courses__in'] = course_refs
+                criteria['courses__in'] = course_ids
 
         queryset = engine.Problem.objects(**criteria)
 
@@ -253,51 +385,55 @@ class Discussion:
     @classmethod
     def _check_code_deadline(cls, problem,
                              user) -> Tuple[str, bool, Optional[datetime]]:
-        """回傳 (role_label, code_allowed, deadline)"""
+        """回傳 (role_label, code_allowed, deadline)，每個 request 內記憶化"""
+        if not has_request_context():
+            return cls._compute_code_deadline(problem, user)
+        cache = getattr(g, '_code_deadline_cache', None)
+        if cache is None:
+            cache = {}
+            g._code_deadline_cache = cache
+        key = (str(problem.problem_id), str(user.pk))
+        if key not in cache:
+            cache[key] = cls._compute_code_deadline(problem, user)
+        return cache[key]
+
+    @classmethod
+    def _compute_code_deadline(cls, problem,
+                               user) -> Tuple[str, bool, Optional[datetime]]:
         # 1. Role Check
-        role_label = 'student'
-        is_staff = user.role in (
-            engine.User.Role.ADMIN,
-            engine.User.Role.TEACHER,
-            engine.User.Role.TA,
-        )
-
-        # Mapping Enum to Label
-        if user.role == engine.User.Role.ADMIN:
-            role_label = 'teacher'
-        elif user.role == engine.User.Role.TEACHER:
-            role_label = 'teacher'
-        elif user.role == engine.User.Role.TA:
-            role_label = 'ta'
+        role_label = _ROLE_LABELS.get(user.role, 'student')
+        is_staff = user.role in _STAFF_ROLES
 
         # Check Course Role
+        user_doc = user.obj
         for course in getattr(problem, 'courses', []) or []:
             if not course:
                 continue
             # Handle ReferenceField resolution if needed
-            if getattr(course, 'teacher', None) == user.obj:
+            if getattr(course, 'teacher', None) == user_doc:
                 role_label = 'teacher'
                 break
-            if user.obj in (getattr(course, 'tas', None) or []):
+            if user_doc in (getattr(course, 'tas', None) or []):
                 role_label = 'ta'
                 break
 
-        # 2. Deadline Check
-        deadlines = []
-        for hw in getattr(problem, 'homeworks', []) or []:
-            if not hw:
-                continue
-            homework = hw
-            if not isinstance(hw, engine.Homework):
-                homework = engine.Homework.objects(id=hw.id).first()
-
-            if homework and getattr(homework, 'duration', None):
-                end = getattr(homework.duration, 'end', None)
-                if end:
-                    deadlines.append(end)
+        # 2. Deadline Check: resolve un-hydrated references in one $in
+        # query instead of one lookup per homework
+        hws = [hw for hw in (getattr(problem, 'homeworks', []) or []) if hw]
+        hydrated = [hw for hw in hws if isinstance(hw, engine.Homework)]
+        pending_ids = [
+            hw.id for hw in hws if not isinstance(hw, engine.Homework)
+        ]
+        if pending_ids:
+            hydrated += list(
+                engine.Homework.objects(id__in=pending_ids).only('duration'))
 
-        deadline = min(deadlines) if deadlines else getattr(
-            problem, 'deadline', None)
+        deadline = min(
+            (end for hw in hydrated
+             if getattr(hw, 'duration', None) and (end := getattr(
+                 hw.duration, 'end', None))),
+            default=None,
+        ) or getattr(problem, 'deadline', None)
 
         # 3. Code Allowed
         if is_staff:
@@ -306,7 +442,7 @@ class Discussion:
         code_allowed = True
         if getattr(problem, 'allow_code', True) is False:
             code_allowed = False
-        elif deadline and datetime.now() < deadline:
+        elif deadline and _now() < deadline:
             code_allowed = False
 
         return role_label, code_allowed, deadline
@@ -319,7 +455,7 @@ class Discussion:
         except ValueError:
             return None, 'Invalid ID'
 
-        problem = engine.Problem.objects(problem_id=pid).first()
+        problem = _cached_problem(pid)
         if not problem:
             return None, 'Problem not found.'
 
@@ -345,7 +481,7 @@ class Discussion:
         if contains_code:
             try:
                 pid = int(problem_id)
-                problem = engine.Problem.objects(problem_id=pid).first()
+                problem = _cached_problem(pid)
                 if problem:
                     _, code_allowed, _ = cls._check_code_deadline(
                         problem, user)
@@ -355,7 +491,7 @@ class Discussion:
             except ValueError:
                 pass
 
-        now = datetime.now()
+        now = _now()
         post = engine.DiscussionPost(
             title=title,
             content=content,
@@ -392,38 +528,123 @@ class Discussion:
         if allowed_ids is not None and not allowed_ids:
             return []
 
-        pattern = re.compile(re.escape(words), re.IGNORECASE)
-        queryset = engine.DiscussionPost.objects(is_deleted=False)
+        global _text_search_available
+        if _text_search_available:
+            try:
+                return cls._search_posts_text(words, allowed_ids, limit, page)
+            except (OperationFailure, NotImplementedError, TypeError):
+                # no text index or a backend without $text (mongomock
+                # surfaces this inconsistently): remember and fall back
+                # to the Python regex scan below
+                _text_search_available = False
+
+        pattern = _compiled_pattern(words)
+        queryset = engine.DiscussionPost.objects(is_deleted=False).only(
+            'post_id', 'author', 'title', 'content', 'created_time',
+            'like_count', 'reply_count')
 
         if allowed_ids is not None:
-            queryset = queryset.filter(problem_id__in=list(allowed_ids))
+            queryset = queryset.filter(problem_id__in=allowed_ids)
 
         matches = []
         for post in queryset:
             if pattern.search(post.title or '') or pattern.search(post.content
                                                                   or ''):
-                matches.append({
-                    # Sort Key: Time DESC, ID DESC (stable tie-breaker)
-                    'sort_key':
-                    (post.created_time.timestamp(), int(post.post_id)),
-                    'data': {
-                        'Post_Id': post.post_id,
-                        'Author': post.author.username if post.author else '',
-                        'Title': post.title,
-                        'Created_Time': post.created_time.isoformat(),
-                        'Like_Count': post.like_count or 0,
-                        'Reply_Count': post.reply_count or 0,
-                    },
-                })
-
-        matches.sort(key=lambda x: x['sort_key'], reverse=True)
+                # Sort Key: Time DESC, ID DESC (stable tie-breaker)
+                matches.append(
+                    ((post.created_time.timestamp(), int(post.post_id)),
+                     post))
 
+        # only the requested page needs ordering: nlargest keeps a
+        # start+limit heap instead of sorting every match
         start = (page - 1) * limit
-        end = start + limit
-        return [m['data'] for m in matches[start:end]]
+        top = heapq.nlargest(start + limit,
+                             matches,
+                             key=lambda item: item[0])
+        return [{
+            'Post_Id': post.post_id,
+            'Author': _author_username(post),
+            'Title': post.title,
+            'Created_Time': post.created_time.isoformat(),
+            'Like_Count': post.like_count or 0,
+            'Reply_Count': post.reply_count or 0,
+        } for _, post in top[start:]]
 
     @classmethod
-    def get_post_detail(cls, user, post_id):
+    def _search_posts_text(cls, words, allowed_ids, limit, page):
+        '''
+        Search through the text index on title/content so matching and
+        ranking happen server-side; only the requested page is decoded.
+        Raises when the backend cannot run `$text`.
+        '''
+        queryset = engine.DiscussionPost.objects(is_deleted=False)
+        if allowed_ids is not None:
+            queryset = queryset.filter(problem_id__in=allowed_ids)
+        queryset = queryset.search_text(words).only(
+            'post_id', 'author', 'title', 'created_time', 'like_count',
+            'reply_count').order_by('$text_score')
+
+        start = (page - 1) * limit
+        return [{
+            'Post_Id': post.post_id,
+            'Author': _author_username(post),
+            'Title': post.title,
+            'Created_Time': post.created_time.isoformat(),
+            'Like_Count': post.like_count or 0,
+            'Reply_Count': post.reply_count or 0,
+        } for post in queryset[start:start + limit]]
+
+    @classmethod
+    def _reply_window(cls, post, limit, offset):
+        '''
+        One page of serialized replies plus a has-more flag; fetches
+        limit + 1 documents so no separate count query is needed.
+        '''
+        replies_qs = engine.DiscussionReply.objects(
+            post=post, is_deleted=False).only(
+                'reply_id', 'author', 'created_time', 'content', 'like_count',
+                'reply_to_id', 'contains_code').order_by('created_time')
+
+        fetched = list(replies_qs.skip(offset).limit(limit + 1))
+        has_more = len(fetched) > limit
+
+        replies_data = []
+        for r in fetched[:limit]:
+            rid, created, content, likes, reply_to, has_code = _REPLY_FIELDS(
+                r)
+            replies_data.append({
+                'Reply_Id': rid,
+                'Author': _author_username(r),
+                'Created_Time': created.isoformat(),
+                'Content': content,
+                'Like_Count': likes or 0,
+                'Reply_To': reply_to,
+                'Contains_Code': bool(has_code),
+            })
+        return replies_data, has_more
+
+    @classmethod
+    def get_replies(cls, user, post_id, limit=20, offset=0):
+        '''
+        Page deeper into a thread without re-sending the post payload.
+        '''
+        post = engine.DiscussionPost.objects(post_id=post_id).only(
+            'post_id', 'is_deleted', 'problem_id', 'reply_count').first()
+        if not post or post.is_deleted:
+            return None, 'Post not found.'
+
+        if not cls._can_view_problem(user, post.problem_id):
+            return None, 'Insufficient permission.'
+
+        replies_data, has_more = cls._reply_window(post, limit, offset)
+        return {
+            'Reply_Count': post.reply_count or 0,
+            'Has_More': has_more,
+            'Replies': replies_data,
+        }, None
+
+    @classmethod
+    def get_post_detail(cls, user, post_id, reply_limit=20, reply_offset=0):
         post = engine.DiscussionPost.objects(post_id=post_id).first()
         if not post or post.is_deleted:
             return None, 'Post not found.'
@@ -431,18 +652,8 @@ class Discussion:
         if not cls._can_view_problem(user, post.problem_id):
             return None, 'Insufficient permission.'
 
-        replies_qs = engine.DiscussionReply.objects(
-            post=post, is_deleted=False).order_by('created_time')
-
-        replies_data = [{
-            'Reply_Id': r.reply_id,
-            'Author': r.author.username if r.author else '',
-            'Created_Time': r.created_time.isoformat(),
-            'Content': r.content,
-            'Like_Count': r.like_count or 0,
-            'Reply_To': r.reply_to_id,
-            'Contains_Code': bool(r.contains_code),
-        } for r in replies_qs]
+        replies_data, has_more = cls._reply_window(post, reply_limit,
+                                                   reply_offset)
 
         # 檢查用戶是否按讚過這個貼文
         post_like = engine.DiscussionLike.objects(
@@ -452,7 +663,7 @@ class Discussion:
         data = {
             'Post_Id': post.post_id,
             'Title': post.title,
-            'Author': post.author.username if post.author else '',
+            'Author': _author_username(post),
             'Created_Time': post.created_time.isoformat(),
             'Content': post.content,
             'Like_Count': post.like_count or 0,
@@ -462,6 +673,7 @@ class Discussion:
             'Is_Solved': bool(post.is_solved),
             'Is_Pinned': bool(post.is_pinned),
             'Is_Closed': bool(post.is_closed),
+            'Has_More': has_more,
             'Replies': replies_data,
         }
         return data, None
@@ -469,7 +681,8 @@ class Discussion:
     @classmethod
     def add_reply(cls, user, post_id, content, reply_to_id,
                   contains_code_flag):
-        post = engine.DiscussionPost.objects(post_id=post_id).first()
+        post = engine.DiscussionPost.objects(post_id=post_id).only(
+            'post_id', 'is_deleted', 'problem_id', 'is_closed').first()
         if not post or post.is_deleted:
             return None, 'Post not found.'
 
@@ -486,7 +699,7 @@ class Discussion:
         if contains_code:
             try:
                 pid = int(post.problem_id)
-                problem = engine.Problem.objects(problem_id=pid).first()
+                problem = _cached_problem(pid)
                 if problem:
                     _, code_allowed, _ = cls._check_code_deadline(
                         problem, user)
@@ -501,11 +714,12 @@ class Discussion:
         if reply_to_id and int(reply_to_id) != post_id:
             target_id = int(reply_to_id)
             parent_reply = engine.DiscussionReply.objects(
-                post=post, reply_id=target_id, is_deleted=False).first()
+                post=post, reply_id=target_id,
+                is_deleted=False).only('reply_id').first()
             if not parent_reply:
                 return None, 'Reply_To target not found.'
 
-        now = datetime.now()
+        now = _now()
         reply = engine.DiscussionReply(
             post=post,
             parent_reply=parent_reply,
@@ -516,13 +730,15 @@ class Discussion:
             created_time=now,
         ).save()
 
-        post.update(inc__reply_count=1, set__updated_time=now)
+        post.update(inc__reply_count=1, inc__hot_score=1,
+                    set__updated_time=now)
         cls._log_action(user, 'CREATE_REPLY', 'reply', reply.reply_id)
         return {'Reply_ID': reply.reply_id}, None
 
     @classmethod
     def toggle_like(cls, user, post_id, target_id, action):
-        post = engine.DiscussionPost.objects(post_id=post_id).first()
+        post = engine.DiscussionPost.objects(post_id=post_id).only(
+            'post_id', 'is_deleted', 'problem_id', 'like_count').first()
         if not post or post.is_deleted:
             return None, 'Post not found.'
 
@@ -534,46 +750,55 @@ class Discussion:
         if target_id == post_id:
             target = post
         else:
-            target = engine.DiscussionReply.objects(post=post,
-                                                    reply_id=target_id,
-                                                    is_deleted=False).first()
+            target = engine.DiscussionReply.objects(
+                post=post, reply_id=target_id,
+                is_deleted=False).only('reply_id', 'like_count').first()
             target_type = 'reply'
 
         if not target:
             return None, 'Target not found.'
 
-        existing_like = engine.DiscussionLike.objects(
-            user=user.obj,
-            target_type=target_type,
-            target_id=target_id,
-        ).first()
+        # one atomic upsert/delete on the like plus one conditional $inc
+        # on the counter; the unique (user, target_type, target_id) index
+        # keeps concurrent likes idempotent
+        like_filter = {
+            'user': user.obj.pk,
+            'target_type': target_type,
+            'target_id': target_id,
+        }
+        likes = engine.DiscussionLike._get_collection()
 
         if action:
-            if not existing_like:
-                engine.DiscussionLike(
-                    user=user.obj,
-                    target_type=target_type,
-                    target_id=target_id,
-                ).save()
-                target.update(inc__like_count=1)
+            result = likes.update_one(
+                like_filter,
+                {'$setOnInsert': {
+                    'createdTime': _now()
+                }},
+                upsert=True,
+            )
+            if result.upserted_id is not None:
                 if target_type == 'post':
+                    target.modify(inc__like_count=1, inc__hot_score=1)
                     log_action = 'LIKE_POST'
                 else:
+                    target.modify(inc__like_count=1)
                     log_action = 'LIKE_REPLY'
                 cls._log_action(user, log_action, target_type, target_id)
         else:
-            if existing_like:
-                existing_like.delete()
-                target.reload('like_count')
-                if (target.like_count or 0) > 0:
-                    target.update(inc__like_count=-1)
+            result = likes.delete_one(like_filter)
+            if result.deleted_count == 1:
+                # the counter never drops below zero
                 if target_type == 'post':
+                    target.modify(query={'like_count__gt': 0},
+                                  inc__like_count=-1,
+                                  inc__hot_score=-1)
                     log_action = 'UNLIKE_POST'
                 else:
+                    target.modify(query={'like_count__gt': 0},
+                                  inc__like_count=-1)
                     log_action = 'UNLIKE_REPLY'
                 cls._log_action(user, log_action, target_type, target_id)
 
-        target.reload('like_count')
         return {
             'Like_Count': target.like_count or 0,
             'Like_Status': action,
@@ -581,36 +806,28 @@ class Discussion:
 
     @classmethod
     def update_status(cls, user, post_id, action_key):
-        role_value = (user.role.value
-                      if hasattr(user.role, 'value') else user.role)
-        if role_value not in _PERMITTED_ROLES_INT:
+        if not _is_staff(user):
             return None, 'Insufficient permission.'
 
-        post = engine.DiscussionPost.objects(post_id=post_id).first()
-        if not post:
-            return None, 'Post not found.'
-
-        actions = {
-            'pin': ('is_pinned', True, 'pinned'),
-            'unpin': ('is_pinned', False, 'unpinned'),
-            'close': ('is_closed', True, 'closed'),
-            'reopen': ('is_closed', False, 'open'),
-            'solve': ('is_solved', True, 'solved'),
-            'unsolve': ('is_solved', False, 'unsolved'),
-        }
-
-        if action_key not in actions:
+        action = _STATUS_ACTIONS.get(action_key)
+        if action is None:
             return None, 'Unsupported action.'
 
-        field, value, status_text = actions[action_key]
-        post.update(**{f'set__{field}': value})
+        # find_one_and_update: existence check and write in one round trip
+        updated = engine.DiscussionPost.objects(post_id=post_id).modify(
+            **{f'set__{action.field}': action.value})
+        if updated is None:
+            return None, 'Post not found.'
+
         cls._log_action(user, f'{action_key.upper()}_POST', 'post', post_id)
 
-        return {'New_Status': status_text}, None
+        return {'New_Status': action.new_status}, None
 
     @classmethod
     def delete_entity(cls, user, post_id, target_type, target_id):
-        post = engine.DiscussionPost.objects(post_id=post_id).first()
+        post = engine.DiscussionPost.objects(post_id=post_id).only(
+            'post_id', 'is_deleted', 'problem_id', 'author', 'reply_count',
+            'like_count').first()
         if not post or post.is_deleted:
             return None, 'Post not found.'
 
@@ -633,8 +850,9 @@ class Discussion:
             return {'Message': 'Post deleted.'}, None
 
         if target_type == 'reply':
-            reply = engine.DiscussionReply.objects(post=post,
-                                                   reply_id=target_id).first()
+            reply = engine.DiscussionReply.objects(
+                post=post, reply_id=target_id).only(
+                    'reply_id', 'author', 'is_deleted').first()
             if not reply or reply.is_deleted:
                 return None, 'Reply not found.'
 
@@ -642,10 +860,23 @@ class Discussion:
                 return None, 'Permission denied.'
 
             reply.update(set__is_deleted=True)
-            post.reload('reply_count')
-            new_count = max((post.reply_count or 0) - 1, 0)
-            post.update(set__reply_count=new_count)
+            # atomic clamped decrement, mirroring the like counter path
+            post.modify(query={'reply_count__gt': 0},
+                        inc__reply_count=-1,
+                        inc__hot_score=-1)
             cls._log_action(user, 'DELETE_REPLY', 'reply', target_id)
             return {'Message': 'Reply deleted.'}, None
 
         return None, 'Invalid type.'
+
+
+def migrate_hot_scores():
+    '''
+    One-off backfill: set hot_score on posts created before the field
+    existed so the indexed Hot ordering ranks them correctly.
+    '''
+    posts = engine.DiscussionPost.objects(hot_score__exists=False).only(
+        'like_count', 'reply_count')
+    for post in posts:
+        post.update(
+            set__hot_score=(post.like_count or 0) + (post.reply_count or 0))
@@ -267,8 +267,14 @@ class AuthorizationCode(EmbeddedDocument):
 
 class Course(Document):
     meta = {
-        'strict': False
-    }  # For development convenience. Please remove when merging is done.
+        # For development convenience. Please remove when merging is done.
+        'strict': False,
+        # get_by_code matches join codes inside the embedded list
+        'indexes': [{
+            'fields': ['auth_codes.code'],
+            'sparse': True,
+        }],
+    }
     course_name = StringField(
         max_length=64,
         required=True,
@@ -392,6 +398,8 @@ class Problem(Document):
 
     meta = {
         'strict': False,  # for development convenience, ignore unknown fields
+        # visibility filter used by the discussion problem listing
+        'indexes': ['problem_status'],
     }
 
     class Visibility:
@@ -699,11 +707,30 @@ class Post(Document):
 
 class DiscussionPost(Document):
     meta = {
-        'indexes': ['problem_id'],
+        'indexes': [
+            'problem_id',
+            # feed filter, also covers its countDocuments
+            ('problem_id', 'is_deleted'),
+            # feed orderings: Hot and New
+            ('-is_pinned', '-hot_score', '-created_time', '-post_id'),
+            ('-is_pinned', '-created_time', '-post_id'),
+            # full-text search over title/content, title weighted higher
+            {
+                'fields': ['$title', '$content'],
+                'default_language': 'none',
+                'weights': {
+                    'title': 10,
+                    'content': 1
+                },
+            },
+        ],
     }
     post_id = SequenceField(db_field='postId', required=True, unique=True)
     title = StringField(required=True, max_length=128)
     content = StringField(required=True, max_length=100000)
+    # like_count + reply_count, maintained on write so the Hot feed can
+    # sort on an indexed field
+    hot_score = IntField(default=0, db_field='hotScore')
     problem_id = StringField(required=True,
                              max_length=64,
                              db_field='problemId')
@@ -723,7 +750,12 @@ class DiscussionPost(Document):
 
 class DiscussionReply(Document):
     meta = {
-        'indexes': ['reply_id', 'post'],
+        'indexes': [
+            'reply_id',
+            'post',
+            # serves the reply listing sort from index order
+            ('post', 'is_deleted', 'created_time'),
+        ],
     }
     reply_id = SequenceField(db_field='replyId', required=True, unique=True)
     post = ReferenceField('DiscussionPost', required=True)
@@ -1,10 +1,19 @@
 from datetime import datetime
 from mongo import engine
 from mongo.course import Course as CourseWrapper
+from mongo.user import User
 
 __all__ = ['Post']
 
 
+def _author_pk(doc):
+    # the user pk is the username, so the raw reference already holds it
+    author = doc._data.get('author')
+    if author is None:
+        return None
+    return getattr(author, 'pk', getattr(author, 'id', author))
+
+
 class Post:
 
     @classmethod
@@ -141,41 +150,65 @@ class Post:
         return None
 
     @classmethod
-    def found_thread(cls, target_thread):
+    def _thread_authors(cls, threads):
+        # collect raw author usernames from every node so all infos
+        # resolve with one projected query
+        names = set()
+        stack = list(threads)
+        while stack:
+            node = stack.pop()
+            if (name := _author_pk(node)) is not None:
+                names.add(name)
+            if node.reply:
+                stack.extend(node.reply)
+        return User.get_infos(names)
+
+    @classmethod
+    def _thread_dict(cls, target_thread, author_infos=None):
+        if author_infos is not None:
+            author = author_infos.get(_author_pk(target_thread)) or {}
+        else:
+            author = target_thread.author.info
         return {
-            'Id':
-            str(target_thread.id),
-            'Content':
-            target_thread.markdown,
-            'Author':
-            target_thread.author.info,
-            'Status':
-            target_thread.status,
-            'Pinned':
-            getattr(target_thread, 'pinned', False),
-            'Closed':
-            getattr(target_thread, 'closed', False),
-            'Solved':
-            getattr(target_thread, 'solved', False),
-            'Created':
-            target_thread.created.timestamp(),
-            'Updated':
-            target_thread.updated.timestamp(),
-            'Reply':
-            [cls.found_thread(r)
-             for r in target_thread.reply] if target_thread.reply else []
+            'Id': str(target_thread.id),
+            'Content': target_thread.markdown,
+            'Author': author,
+            'Status': target_thread.status,
+            'Pinned': getattr(target_thread, 'pinned', False),
+            'Closed': getattr(target_thread, 'closed', False),
+            'Solved': getattr(target_thread, 'solved', False),
+            'Created': target_thread.created.timestamp(),
+            'Updated': target_thread.updated.timestamp(),
+            'Reply': [],
         }
 
+    @classmethod
+    def found_thread(cls, target_thread, author_infos=None):
+        # explicit stack: deep reply chains stay O(1) in interpreter
+        # stack depth instead of recursing once per node
+        if author_infos is None:
+            author_infos = cls._thread_authors([target_thread])
+        root = cls._thread_dict(target_thread, author_infos)
+        stack = [(target_thread, root)]
+        while stack:
+            node, serialized = stack.pop()
+            for reply in node.reply or []:
+                child = cls._thread_dict(reply, author_infos)
+                serialized['Reply'].append(child)
+                stack.append((reply, child))
+        return root
+
     @classmethod
     def found_post(cls, course_obj, target_id=None):
-        data = []
-        for x in course_obj.posts:
-            if target_id and str(x.thread.id) != target_id: continue
-            data.append({
-                'thread': cls.found_thread(x.thread),
-                'title': x.post_name
-            })
-        return data
+        posts = [
+            x for x in course_obj.posts
+            if not (target_id and str(x.thread.id) != target_id)
+        ]
+        author_infos = cls._thread_authors([x.thread for x in posts])
+        return [{
+            'thread': cls.found_thread(x.thread, author_infos),
+            'title': x.post_name,
+        } for x in posts]
 
     @classmethod
     def add_post(cls, course, user, content, title):
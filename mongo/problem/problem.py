@@ -531,6 +531,34 @@ class Problem(MongoBase, engine=engine.Problem):
         right = min(len(problems), right)
         return problems[offset:right]
 
+    @classmethod
+    def get_problem_lists_by_courses(cls, user, course_names: List[str]):
+        '''
+        get problem lists of multiple courses at once, keyed by course name
+
+        fetches every problem of the given courses in a single query
+        instead of one query per course
+        '''
+        courses = engine.Course.objects(course_name__in=course_names).only(
+            'course_name')
+        id2name = {c.id: c.course_name for c in courses}
+        result = {name: [] for name in id2name.values()}
+        qs = engine.Problem.objects(courses__in=[*id2name])
+        # raw course ids per problem, so grouping doesn't dereference
+        # the course references of every problem
+        pid2cids = {
+            raw['_id']: raw.get('courses', [])
+            for raw in qs.only('courses').as_pymongo()
+        }
+        for p in qs.order_by('problemId'):
+            if not cls(p).permission(user=user, req=cls.Permission.ONLINE):
+                continue
+            for cid in pid2cids.get(p.problem_id, []):
+                name = id2name.get(cid)
+                if name is not None:
+                    result[name].append(p)
+        return result
+
     @classmethod
     def add(
         cls,
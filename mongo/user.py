@@ -267,12 +267,21 @@ class User(MongoBase, engine=engine.User):
         self.reload()
 
     @classmethod
-    def search(cls, q: str, limit: int = 5):
+    def search(cls, q: str, limit: int = 20, exclude_usernames=None):
         '''
-        Search users by username or email
+        Search users by username or email prefix, optionally excluding a
+        set of usernames server-side. Emails are stored lowercased, so
+        their prefix match is case-sensitive and index-capable; the
+        username match stays case-insensitive (usernames are not
+        normalized), which Mongo cannot serve from the _id index — the
+        min-length guard and limit at the call sites bound that scan.
         '''
-        query = engine.Q(username__icontains=q) | engine.Q(email__icontains=q)
-        return engine.User.objects(query).limit(limit)
+        query = engine.Q(username__istartswith=q) | engine.Q(
+            email__startswith=q.lower())
+        if exclude_usernames:
+            query &= engine.Q(username__nin=list(exclude_usernames))
+        return engine.User.objects(query).only('username', 'profile',
+                                               'role').limit(limit)
 
     @classmethod
     def login(cls, username, password, ip_addr):
@@ -306,6 +315,20 @@ class User(MongoBase, engine=engine.User):
         obj = cls.engine.objects.get(email=email.lower())
         return cls(obj)
 
+    @classmethod
+    def get_infos(cls, usernames) -> Dict[str, Dict[str, Any]]:
+        '''
+        Get `info` of multiple users in one projected query, keyed by
+        username, instead of constructing a `User` per name
+        '''
+        users = cls.engine.objects(username__in=[*usernames]).only(
+            'username',
+            'profile',
+            'md5',
+            'role',
+        )
+        return {u.username: u.info for u in users}
+
     @property
     def displayedName(self):
         return self.profile.displayed_name
@@ -218,6 +218,20 @@ class TestAiChatbot(BaseAiTest):
         assert data[-1]['role'] == 'model'
         assert data[-1]['text'] == 'Answer 1'
 
+    def test_get_history_conditional_get(self, client_student):
+        """
+        Repeated polls with If-None-Match should get 304 without a body.
+        """
+        url = f'/ai/chatbot/history?course_name={self.course_name}'
+        rv = client_student.get(url)
+        assert rv.status_code == 200, rv.get_json()
+        etag = rv.headers.get('ETag')
+        assert etag
+
+        rv304 = client_student.get(url, headers={'If-None-Match': etag})
+        assert rv304.status_code == 304
+        assert rv304.get_data() == b''
+
     def test_ask_missing_params_400(self, client_student):
         """
         Missing message/problem_id/course_name should return 400.
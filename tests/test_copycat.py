@@ -94,22 +94,53 @@ class TestCopyCat(BaseTester):
     def test_get_report(self, client_admin, problem_ids, monkeypatch):
         from model import copycat
 
-        def mock_get_report_by_url(_, count=[]):
-            count.append(87)
-            return f'this is a report url {len(count)}'
+        def mock_get_report_by_url(url):
+            return f'this is the report for {url}'
 
         monkeypatch.setattr(copycat, 'get_report_by_url',
                             mock_get_report_by_url)
         pid = problem_ids("teacher", 1, True)[0]
         problem = Problem(pid)
-        problem.update(moss_status=2)
+        problem.update(
+            moss_status=2,
+            cpp_report_url='cpp-url',
+            python_report_url='python-url',
+        )
+
+        # Default (JSON) clients only get the report URLs
         rv = client_admin.get(f'/copycat?course=Public&problemId={pid}')
         assert rv.status_code == 200, rv.get_json()
         assert rv.get_json()['data'] == {
-            "cpp_report": 'this is a report url 1',
-            "python_report": 'this is a report url 2'
+            "cpp_report_url": 'cpp-url',
+            "python_report_url": 'python-url',
+        }
+
+        # Clients accepting text/html additionally get the proxied bodies
+        rv = client_admin.get(
+            f'/copycat?course=Public&problemId={pid}',
+            headers={'Accept': 'text/html'},
+        )
+        assert rv.status_code == 200, rv.get_json()
+        assert rv.get_json()['data'] == {
+            "cpp_report_url": 'cpp-url',
+            "python_report_url": 'python-url',
+            "cpp_report": 'this is the report for cpp-url',
+            "python_report": 'this is the report for python-url'
         }
 
+    def test_service_lookups_are_request_cached(self, app):
+        from mongo import copycat_service
+
+        with app.test_request_context('/'):
+            first = copycat_service.get_course('Public')
+            second = copycat_service.get_course('Public')
+            assert first is second
+
+        # Outside a request context each call hits the database again
+        first = copycat_service.get_course('Public')
+        second = copycat_service.get_course('Public')
+        assert first is not second
+
     def test_is_valid_url(self):
         from model.copycat import is_valid_url
         assert is_valid_url('https://example.com:8787/abc?def=1234&A_A=Q_Q')
@@ -196,25 +227,26 @@ class TestCopyCat(BaseTester):
         assert problem.python_report_url == ''
 
     def test_get_report_by_url(self, monkeypatch):
-        from model.copycat import requests
+        from model import copycat
 
-        class mock_requests_get:
+        class mock_response:
 
             def __init__(self, text):
                 self.text = text
 
-        monkeypatch.setattr(requests, 'get', mock_requests_get)
+        monkeypatch.setattr(copycat._MOSS_SESSION, 'get',
+                            lambda url, **kwargs: mock_response(url))
         from model.copycat import get_report_by_url
         url = 'https://example.com:8787/abc?def=1234&A_A=Q_Q'
         assert get_report_by_url(url) == url
 
     def test_get_report_by_url_with_invalid_schema(self, monkeypatch):
-        from model.copycat import requests
+        from model import copycat
 
-        def mock_requests_get(_):
-            raise requests.exceptions.InvalidSchema
+        def mock_session_get(url, **kwargs):
+            raise copycat.requests.exceptions.InvalidSchema
 
-        monkeypatch.setattr(requests, 'get', mock_requests_get)
+        monkeypatch.setattr(copycat._MOSS_SESSION, 'get', mock_session_get)
         from model.copycat import get_report_by_url
         url = 'https://example.com:8787/abc?def=1234&A_A=Q_Q'
         assert get_report_by_url(url) == 'No report.'
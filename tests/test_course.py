@@ -1,5 +1,7 @@
+from datetime import datetime
+
 from mongo import engine, Course, Homework, User
-from mongo import DoesNotExist
+from mongo import DoesNotExist, migrate_student_scores
 from tests.conftest import ForgeClient
 from tests.base_tester import BaseTester
 from tests import utils
@@ -612,6 +614,32 @@ class TestCourseGrade(BaseTester):
         json = rv.get_json()
         assert json['message'] == 'You are not in this course.'
 
+    def test_migrate_legacy_score_list(self, course_name):
+        try:
+            utils.course.create_course(name=course_name,
+                                       teacher=User('admin'),
+                                       students=['student'])
+        except engine.NotUniqueError:
+            pass
+        course = Course(course_name)
+        ts = datetime.now()
+        course.update(
+            student_scores={
+                'student': [{
+                    'title': 'exam',
+                    'content': 'hard',
+                    'score': 'A+',
+                    'timestamp': ts,
+                }]
+            })
+        migrate_student_scores()
+        course.reload()
+        entry = course.student_scores['student']['exam']
+        assert entry['content'] == 'hard'
+        assert entry['score'] == 'A+'
+        # BSON stores millisecond precision
+        assert abs((entry['timestamp'] - ts).total_seconds()) < 1e-3
+
 
 class TestScoreBoard(BaseTester):
 
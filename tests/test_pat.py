@@ -38,6 +38,39 @@ class TestPATHelpers:
         assert PersonalAccessToken.hash_token(
             "noj_pat_different_secret") != hash_val
 
+        # Keyed BLAKE2b must not collide with the legacy SHA-256 value
+        assert PersonalAccessToken.legacy_hash_token(token) != hash_val
+
+    def test_get_by_token(self):
+        """Test plaintext token lookup via the current hash"""
+        pat = PersonalAccessToken.get_by_token("noj_pat_test_secret")
+        assert pat.pat_id == 'test_001'
+
+    def test_get_by_token_migrates_legacy_hash(self):
+        """Legacy SHA-256 hashed tokens are found and upgraded in place"""
+        legacy_token = "noj_pat_legacy_secret"
+        PersonalAccessToken.add(
+            pat_id='legacy_001',
+            name='Legacy PAT',
+            owner='test_user',
+            hash_val=PersonalAccessToken.legacy_hash_token(legacy_token),
+            scope=['read'],
+            due_time=None)
+
+        pat = PersonalAccessToken.get_by_token(legacy_token)
+        assert pat.pat_id == 'legacy_001'
+        # Stored hash is migrated to the keyed BLAKE2b format
+        assert pat.hash == PersonalAccessToken.hash_token(legacy_token)
+        # Subsequent lookups hit the fast path
+        assert PersonalAccessToken.get_by_token(
+            legacy_token).pat_id == 'legacy_001'
+
+    def test_get_by_token_unknown_raises(self):
+        """Unknown tokens raise DoesNotExist after both hash attempts"""
+        from mongo import engine
+        with pytest.raises(engine.DoesNotExist):
+            PersonalAccessToken.get_by_token("noj_pat_no_such_token")
+
     def test_clean_token(self):
         """Test token mapping from MongoDB object"""
         pat = PersonalAccessToken(
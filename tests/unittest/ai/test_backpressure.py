@@ -0,0 +1,73 @@
+import pytest
+from model.ai import backpressure
+from model.ai.backpressure import AIMDController, get_controller, snapshot_all
+from model.ai.exceptions import RateLimitExceededError
+
+
+@pytest.fixture(autouse=True)
+def clear_controllers():
+    backpressure._controllers.clear()
+    yield
+    backpressure._controllers.clear()
+
+
+def test_get_controller_is_per_model():
+    a = get_controller('model-a')
+    b = get_controller('model-b')
+    assert a is not b
+    assert get_controller('model-a') is a
+
+
+def test_additive_increase_on_fast_responses():
+    controller = AIMDController('test')
+    initial = controller.snapshot()['limit']
+    for _ in range(4):
+        controller.record_ok(0.1)
+    assert controller.snapshot()['limit'] > initial
+
+
+def test_multiplicative_decrease_on_error():
+    controller = AIMDController('test')
+    initial = controller.snapshot()['limit']
+    controller.record_err()
+    assert controller.snapshot()['limit'] == initial // 2
+
+
+def test_limit_never_drops_below_floor():
+    controller = AIMDController('test')
+    for _ in range(10):
+        controller.record_err()
+    assert controller.snapshot()['limit'] == backpressure.MIN_CONCURRENCY
+
+
+def test_limit_capped_at_ceiling():
+    controller = AIMDController('test')
+    for _ in range(1000):
+        controller.record_ok(0.1)
+    assert controller.snapshot()['limit'] == backpressure.MAX_CONCURRENCY
+
+
+def test_saturated_controller_rejects(monkeypatch):
+    monkeypatch.setattr(backpressure, 'ACQUIRE_TIMEOUT', 0.05)
+    controller = AIMDController('test')
+    for _ in range(10):
+        controller.record_err()
+    with controller:
+        with pytest.raises(RateLimitExceededError):
+            controller.__enter__()
+    assert controller.snapshot()['rejected'] == 1
+
+
+def test_slot_released_after_exit():
+    controller = AIMDController('test')
+    with controller:
+        assert controller.snapshot()['active'] == 1
+    assert controller.snapshot()['active'] == 0
+
+
+def test_snapshot_all_reports_every_model():
+    get_controller('model-a').record_ok(0.1)
+    get_controller('model-b').record_err()
+    snapshot = snapshot_all()
+    assert snapshot['model-a']['ok'] == 1
+    assert snapshot['model-b']['err'] == 1
@@ -0,0 +1,67 @@
+import threading
+import pytest
+from model.ai.coalesce import make_key, coalesced_call
+
+
+def test_make_key_is_deterministic():
+    a = make_key('course', '1', 'hello', '', 'en')
+    b = make_key('course', '1', 'hello', '', 'en')
+    assert a == b
+
+
+def test_make_key_distinguishes_fields():
+    assert make_key('course', '1', 'hello') != make_key('course', '1', 'world')
+    # Field boundaries matter, not just the concatenation
+    assert make_key('ab', 'c') != make_key('a', 'bc')
+
+
+def test_single_caller_gets_result():
+    assert coalesced_call(make_key('x'), lambda: 42) == 42
+
+
+def test_exception_propagates_to_leader():
+    with pytest.raises(ValueError):
+        coalesced_call(make_key('boom'), lambda: (_ for _ in ()).throw(
+            ValueError('boom')))
+
+
+def test_concurrent_duplicates_share_one_call():
+    key = make_key('dup')
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def slow_fn():
+        calls.append(1)
+        started.set()
+        release.wait(timeout=5)
+        return 'shared'
+
+    results = []
+
+    def worker():
+        results.append(coalesced_call(key, slow_fn))
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    threads[0].start()
+    assert started.wait(timeout=5)
+    for t in threads[1:]:
+        t.start()
+    release.set()
+    for t in threads:
+        t.join(timeout=5)
+
+    assert len(calls) == 1
+    assert results == ['shared'] * 4
+
+
+def test_key_released_after_completion():
+    key = make_key('sequential')
+    calls = []
+
+    def fn():
+        calls.append(1)
+        return len(calls)
+
+    assert coalesced_call(key, fn) == 1
+    assert coalesced_call(key, fn) == 2
@@ -0,0 +1,66 @@
+import pytest
+from model.ai import key_manager
+from model.ai.key_manager import resolve_course_key_and_model
+
+
+@pytest.fixture(autouse=True)
+def clear_resolve_cache():
+    key_manager._resolve_cache.clear()
+    yield
+    key_manager._resolve_cache.clear()
+
+
+def test_successful_resolution_is_cached(monkeypatch):
+    calls = []
+
+    def fake_resolve(course_name, api_key_id=None):
+        calls.append(course_name)
+        return object(), 'gemini-2.5-flash', None
+
+    monkeypatch.setattr(key_manager, '_resolve', fake_resolve)
+    first = resolve_course_key_and_model('course-a')
+    second = resolve_course_key_and_model('course-a')
+    assert first == second
+    assert len(calls) == 1
+
+
+def test_failed_resolution_is_not_cached(monkeypatch):
+    calls = []
+
+    def fake_resolve(course_name, api_key_id=None):
+        calls.append(course_name)
+        return None, 'gemini-2.5-flash', 'No API keys configured.'
+
+    monkeypatch.setattr(key_manager, '_resolve', fake_resolve)
+    resolve_course_key_and_model('course-a')
+    resolve_course_key_and_model('course-a')
+    assert len(calls) == 2
+
+
+def test_cache_keyed_by_course_and_key_id(monkeypatch):
+    calls = []
+
+    def fake_resolve(course_name, api_key_id=None):
+        calls.append((course_name, api_key_id))
+        return object(), 'gemini-2.5-flash', None
+
+    monkeypatch.setattr(key_manager, '_resolve', fake_resolve)
+    resolve_course_key_and_model('course-a')
+    resolve_course_key_and_model('course-a', 'key-1')
+    resolve_course_key_and_model('course-b')
+    assert calls == [('course-a', None), ('course-a', 'key-1'),
+                     ('course-b', None)]
+
+
+def test_expired_entry_is_refetched(monkeypatch):
+    calls = []
+
+    def fake_resolve(course_name, api_key_id=None):
+        calls.append(course_name)
+        return object(), 'gemini-2.5-flash', None
+
+    monkeypatch.setattr(key_manager, '_resolve', fake_resolve)
+    resolve_course_key_and_model('course-a')
+    monkeypatch.setattr(key_manager, 'RESOLVE_TTL', 0.0)
+    resolve_course_key_and_model('course-a')
+    assert len(calls) == 2